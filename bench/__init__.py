@@ -0,0 +1,3 @@
+# Benchmarks for the six programs: seeded input generators (generators.py), the solver variants and their
+#   checks (cases.py), and the runner that times them and compares against a baseline (runner.py).
+#   Run from the top of the repo: python -m bench.runner --help
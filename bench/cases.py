@@ -0,0 +1,285 @@
+import importlib.util
+import math
+import os
+import sys
+from collections import Counter
+
+# The shared helpers live in common/ at the top of the repo
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from common.edgelist import read_edge_list
+from common.graphfile import GRAPH_SUFFIX
+
+from bench import generators
+
+# The programs, by the solver name their stats use
+SCRIPTS = {
+    "dijkstra": "midterm/dijkstra_solver.py",
+    "max_flow": "regular Assignments/3/Program/ford_fulkerson_algo.py",
+    "mincut": "final/mincut.py",
+    "huffman": "regular Assignments/2/programs/ass_2_huffmans_algo.py",
+    "coeff_finder": "regular Assignments/4/coeff_finder_ass4.py",
+    "eulerian": "regular Assignments/1/programs/ass_1_EulerianChecker.py",
+}
+
+# Files the programs cache next to an input. The runner deletes them before every run, so each run
+#   starts cold (parsing included) unless asked to keep them
+CACHE_SUFFIXES = (GRAPH_SUFFIX, ".landmarks")
+
+_scripts = {}
+
+# Function to import one of the programs from its file (they live in folders that aren't packages)
+def load_script(solver):
+    if solver not in _scripts:
+        path = os.path.join(REPO_ROOT, SCRIPTS[solver])
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module  # So the program's own process pools can pickle its functions
+        spec.loader.exec_module(module)
+        _scripts[solver] = module
+    return _scripts[solver]
+
+# One benchmark: a generator for the inputs, the program and how to run it (run(module, input_file,
+#   output_file, stats)), and a check. check(input_file, output_file, reference_output) returns None if
+#   the output is right, else what is wrong. reference names the case whose output this one must agree
+#   with (the program's default engine, i.e. the current reference implementation); the runner passes
+#   that case's output on the same input, or None for a case without a reference
+class Case:
+    def __init__(self, name, solver, generator, run, check, reference=None):
+        self.name = name
+        self.solver = solver
+        self.generator = generator
+        self.run = run
+        self.check = check
+        self.reference = reference
+
+
+# Function to read a Dijkstra output: the path as a list of vertices, or None for "No path found"
+def _read_path(output_file):
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    if "Minimum weight path:" not in lines:
+        return None
+    return list(map(int, lines[lines.index("Minimum weight path:") + 1].split()))
+
+# Function to check a shortest path: it must go from the start to the end vertex along edges of the
+#   graph, and weigh the same as the reference path (parallel edges count with their lightest weight)
+def check_shortest_path(input_file, output_file, reference_output):
+    path = _read_path(output_file)
+    reference = _read_path(reference_output) if reference_output else None
+    if path is None:
+        return "no path found, the reference found one" if reference else None
+    if reference_output and reference is None:
+        return "found a path, the reference found none"
+    header, edges = read_edge_list(input_file, header_lines=2, num_columns=3)
+    start, end = header[1]
+    if path[0] != start or path[-1] != end:
+        return f"path goes from {path[0]} to {path[-1]}, not {start} to {end}"
+    steps = [list(zip(p, p[1:])) for p in (path, reference or [])]
+    wanted = {(min(u, v), max(u, v)) for step in steps for u, v in step}
+    lightest = {}
+    for u, v, w in edges:
+        key = (min(u, v), max(u, v))
+        if key in wanted and (key not in lightest or w < lightest[key]):
+            lightest[key] = w
+    missing = wanted - lightest.keys()
+    if missing:
+        return f"path uses {len(missing)} pairs that aren't edges, e.g. {min(missing)}"
+    weight, reference_weight = (sum(lightest[(min(u, v), max(u, v))] for u, v in step) for step in steps)
+    if reference is not None and weight != reference_weight:
+        return f"path weighs {weight}, the reference path {reference_weight}"
+    return None
+
+# Function to check a max flow with its own certificate, so no other engine has to run: every flow
+#   fits its edge's capacity, every vertex but the source and sink keeps what it gets, the listed cut
+#   is exactly the edges leaving the listed source side, and its capacity equals the flow. A flow and a
+#   cut of the same value are both optimal (max-flow min-cut theorem)
+def check_max_flow(input_file, output_file, reference_output):
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    value = int(lines[0].split(":")[1])
+    flows_at = lines.index("Flow values on all edges:") + 1
+    left_at = lines.index("Vertices on the left side of the minimum cut:") + 1
+    cut_at = lines.index("Edges in the minimum cut with capacities:") + 1
+    header, edges = read_edge_list(input_file, header_lines=2, num_columns=3)
+    source, sink = header[1]
+    capacity = {(u, v): w for u, v, w in edges}  # The last capacity of a repeated edge wins, as in the program
+    balance = Counter()
+    for line in lines[flows_at:left_at - 1]:
+        arc, amount = line[len("Edge "):].split(", Flow: ")
+        u, v = map(int, arc.split("-"))
+        if int(amount) > capacity.get((u, v), 0):
+            return f"flow {amount} on {u}-{v} is over its capacity {capacity.get((u, v), 0)}"
+        balance[u] -= int(amount)
+        balance[v] += int(amount)
+    unbalanced = [x for x, net in balance.items() if net and x not in (source, sink)]
+    if unbalanced:
+        return f"flow isn't conserved at vertex {min(unbalanced)}"
+    if -balance[source] != value:
+        return f"flow out of the source is {-balance[source]}, not {value}"
+    left = {int(item.split()[0]) for item in lines[left_at].split(", ")}
+    if source not in left or sink in left:
+        return "the cut doesn't separate the source from the sink"
+    crossing = sorted((u, v, w) for (u, v), w in capacity.items() if u in left and v not in left and w > 0)
+    listed = sorted((*map(int, line[len("Edge "):].split(", Cap: ")[0].split("-")), int(line.rsplit(": ", 1)[1]))
+                    for line in lines[cut_at:] if line)
+    if listed != crossing:
+        return "the listed cut edges aren't the edges leaving the source side"
+    if sum(w for _, _, w in crossing) != value:
+        return f"flow {value} but the cut has capacity {sum(w for _, _, w in crossing)}"
+    return None
+
+# Function to check a minimum cut against the planted one (see generators.dense_mincut), and against the
+#   weights of the cut edges it lists
+def check_min_cut(input_file, output_file, reference_output):
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    weight = int(lines[0].split()[-1].rstrip("."))
+    listed = sum(int(line.split()[-1]) for line in lines[lines.index("The edges of the cut with their weights are:") + 1:] if line)
+    if weight != listed:
+        return f"cut weight {weight} but the listed edges weigh {listed}"
+    expected = generators.read_facts(input_file).get("cut_weight")
+    if expected is not None and weight != expected:
+        return f"cut weight {weight}, the planted cut weighs {expected}"
+    return None
+
+# Function to read a Huffman output: {symbol: codeword} and the average line as written
+def _read_codes(output_file):
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    codes = dict(line.split() for line in lines[1:] if not line.startswith("Average"))
+    average = next(line for line in lines if line.startswith("Average number of bits used"))
+    return codes, average
+
+# Function to check Huffman codes: prefix-free, and as short on average as the reference codes (every
+#   optimal code has the same average, even when ties give different codewords)
+def check_codes(input_file, output_file, reference_output):
+    codes, average = _read_codes(output_file)
+    words = sorted(codes.values())
+    for a, b in zip(words, words[1:]):
+        if b.startswith(a):
+            return f"{a} is a prefix of {b}"
+    if reference_output:
+        reference_average = _read_codes(reference_output)[1]
+        if average != reference_average:
+            return f"'{average}', the reference has '{reference_average}'"
+    return None
+
+# Function to tell whether a coefficient matches the expected one to the printed 8 decimals, or to 9
+#   significant digits for large ones
+def _coefficient_close(x, y):
+    return abs(x - y) <= 1.5e-8 + 1e-9 * abs(y)
+
+# Function to check power series results against the reference: the k-th power coefficients agree to
+#   the printed 8 decimals (FFT and schoolbook products round differently), everything else exactly.
+#   Inputs with a known closed form (see generators.binomial_series and generators.geometric_series) are
+#   also checked against it: the k-th power against C(k, i), the reciprocal against r^i or 1 - r x, or
+#   the inverse against the tree function (generators.dense_series and generators.dense_inverse_series)
+def check_series(input_file, output_file, reference_output):
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    if reference_output:
+        with open(reference_output) as g:
+            reference_lines = g.read().splitlines()
+        if len(lines) != len(reference_lines):
+            return "different number of lines from the reference"
+        for number, (line, reference_line) in enumerate(zip(lines, reference_lines)):
+            if line == reference_line:
+                continue
+            values, reference_values = line.split(), reference_line.split()
+            if len(values) != len(reference_values) or lines[number - 1] != "k-th Power Coefficients:":
+                return "differs from the reference outside the k-th power"
+            for i, (x, y) in enumerate(zip(map(float, values), map(float, reference_values))):
+                if not _coefficient_close(x, y):
+                    return f"coefficient {i} of the k-th power is {x}, the reference has {y}"
+    facts = generators.read_facts(input_file)
+    expected = {}
+    if "binomial_k" in facts:
+        expected["k-th Power Coefficients:"] = lambda i: float(math.comb(facts["binomial_k"], i))
+    if "ratio" in facts:
+        expected["Reciprocal Coefficients:"] = lambda i: facts["ratio"] ** i
+    if "reciprocal_ratio" in facts:
+        expected["Reciprocal Coefficients:"] = lambda i: (1.0, -facts["reciprocal_ratio"])[i] if i < 2 else 0.0
+    if "inverse_scale" in facts:
+        expected["Inverse Coefficients:"] = lambda i: i and math.exp((i - 1) * math.log(i * facts["inverse_scale"]) - math.lgamma(i + 1))
+    for heading, term in expected.items():
+        if heading not in lines:
+            return f"no '{heading}' in the output"
+        for i, x in enumerate(map(float, lines[lines.index(heading) + 1].split())):
+            if not _coefficient_close(x, term(i)):
+                return f"coefficient {i} after '{heading}' is {x}, it should be {term(i)}"
+    return None
+
+# Function to check an Eulerian tour: closed, and using every edge of the graph exactly once
+def check_tour(input_file, output_file, reference_output):
+    with open(output_file) as f:
+        lines = f.read().splitlines()
+    if lines[0] != "The graph has an Eulerian tour (closed).":
+        return f"expected a tour, got '{lines[0]}'"
+    tour = list(map(int, lines[1].split(":", 1)[1].split("->")))
+    if tour[0] != tour[-1]:
+        return "the tour doesn't end where it starts"
+    walked = Counter((min(u, v), max(u, v)) for u, v in zip(tour, tour[1:]))
+    _, edges = read_edge_list(input_file, header_lines=1, num_columns=2)
+    if walked != Counter((min(u, v), max(u, v)) for u, v in edges):
+        return "the tour doesn't use every edge exactly once"
+    return None
+
+
+# The benchmarks, references before the cases that compare against them
+CASES = [
+    Case("grid.dijkstra", "dijkstra", generators.road_grid,
+         lambda m, i, o, s: m.process_file(i, o, "dijkstra", s), check_shortest_path),
+    Case("grid.bidirectional", "dijkstra", generators.road_grid,
+         lambda m, i, o, s: m.process_file(i, o, "bidirectional", s), check_shortest_path, "grid.dijkstra"),
+    Case("grid.alt", "dijkstra", generators.road_grid,
+         lambda m, i, o, s: m.process_file(i, o, "alt", s), check_shortest_path, "grid.dijkstra"),
+    Case("grid.heap", "dijkstra", generators.road_grid,
+         lambda m, i, o, s: m.process_file(i, o, "dijkstra", s, queue="heap"), check_shortest_path, "grid.dijkstra"),
+    Case("grid.radix", "dijkstra", generators.road_grid,
+         lambda m, i, o, s: m.process_file(i, o, "dijkstra", s, queue="radix"), check_shortest_path, "grid.dijkstra"),
+    Case("sparse.dijkstra", "dijkstra", generators.random_sparse,
+         lambda m, i, o, s: m.process_file(i, o, "dijkstra", s), check_shortest_path),
+    Case("sparse.bidirectional", "dijkstra", generators.random_sparse,
+         lambda m, i, o, s: m.process_file(i, o, "bidirectional", s), check_shortest_path, "sparse.dijkstra"),
+    Case("sparse.alt", "dijkstra", generators.random_sparse,
+         lambda m, i, o, s: m.process_file(i, o, "alt", s), check_shortest_path, "sparse.dijkstra"),
+    Case("sparse.heap", "dijkstra", generators.random_sparse,
+         lambda m, i, o, s: m.process_file(i, o, "dijkstra", s, queue="heap"), check_shortest_path, "sparse.dijkstra"),
+    Case("sparse.radix", "dijkstra", generators.random_sparse,
+         lambda m, i, o, s: m.process_file(i, o, "dijkstra", s, queue="radix"), check_shortest_path, "sparse.dijkstra"),
+    Case("flow.edmonds_karp", "max_flow", generators.layered_flow,
+         lambda m, i, o, s: m.process_file(i, o, "edmonds_karp", s), check_max_flow),
+    Case("flow.dinic", "max_flow", generators.layered_flow,
+         lambda m, i, o, s: m.process_file(i, o, "dinic", s), check_max_flow),
+    Case("flow.push_relabel", "max_flow", generators.layered_flow,
+         lambda m, i, o, s: m.process_file(i, o, "push_relabel", s), check_max_flow),
+    Case("mincut.stoer_wagner", "mincut", generators.dense_mincut,
+         lambda m, i, o, s: m.process_file(i, o, "stoer_wagner", s), check_min_cut),
+    Case("zipf.tree", "huffman", generators.zipf_symbols,
+         lambda m, i, o, s: m.huffman_algo(i, o, s, "tree"), check_codes),
+    Case("zipf.two_queue", "huffman", generators.zipf_symbols,
+         lambda m, i, o, s: m.huffman_algo(i, o, s, "two_queue"), check_codes, "zipf.tree"),
+    Case("series.repeated", "coeff_finder", generators.power_series,
+         lambda m, i, o, s: m.process_file(i, o, s, power_method="repeated"), check_series),
+    Case("series.binary", "coeff_finder", generators.power_series,
+         lambda m, i, o, s: m.process_file(i, o, s, power_method="binary"), check_series, "series.repeated"),
+    Case("series.miller", "coeff_finder", generators.power_series,
+         lambda m, i, o, s: m.process_file(i, o, s, power_method="miller"), check_series, "series.repeated"),
+    Case("binomial.repeated", "coeff_finder", generators.binomial_series,
+         lambda m, i, o, s: m.process_file(i, o, s, power_method="repeated"), check_series),
+    Case("binomial.binary", "coeff_finder", generators.binomial_series,
+         lambda m, i, o, s: m.process_file(i, o, s, power_method="binary"), check_series, "binomial.repeated"),
+    Case("binomial.miller", "coeff_finder", generators.binomial_series,
+         lambda m, i, o, s: m.process_file(i, o, s, power_method="miller"), check_series, "binomial.repeated"),
+    Case("geometric.newton", "coeff_finder", generators.geometric_series,
+         lambda m, i, o, s: m.process_file(i, o, s, series_method="newton"), check_series),
+    Case("dense.newton", "coeff_finder", generators.dense_series,
+         lambda m, i, o, s: m.process_file(i, o, s, series_method="newton"), check_series),
+    Case("dense_inverse.newton", "coeff_finder", generators.dense_inverse_series,
+         lambda m, i, o, s: m.process_file(i, o, s, series_method="newton"), check_series),
+    Case("euler.hierholzer", "eulerian", generators.eulerian_walk,
+         lambda m, i, o, s: m.eulerian_trail(i, o, s), check_tour),
+]
+CASES_BY_NAME = {case.name: case for case in CASES}
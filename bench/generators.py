@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import random
+from array import array
+
+# Seeded input generators, one per kind of workload, each writing the text format its program reads.
+#   size is the number of edges for graphs, of symbols for symbol tables and of coefficients (m) for
+#   power series; anything from 10^2 to 10^7 works. The same (size, seed) always gives the same file.
+#   Facts known by construction (e.g. the planted minimum cut) are saved next to the input as
+#   <input>.json, for the checks in cases.py
+
+LINES_PER_WRITE = 100000
+
+# Function to write header lines and then one line per row. Written to a temporary file first, so an
+#   interrupted run never leaves half an input behind to be picked up next time
+def write_rows(file_path, header, rows):
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            for line in header:
+                f.write(" ".join(map(str, line)) + "\n")
+            batch = []
+            for row in rows:
+                batch.append(" ".join(map(str, row)))
+                if len(batch) == LINES_PER_WRITE:
+                    f.write("\n".join(batch) + "\n")
+                    batch = []
+            if batch:
+                f.write("\n".join(batch) + "\n")
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+# Function to save the facts for an input (see above)
+def write_facts(file_path, facts):
+    with open(file_path + ".json", 'w') as f:
+        json.dump(facts, f)
+
+# Function to load the facts saved for an input, {} if there are none
+def read_facts(file_path):
+    try:
+        with open(file_path + ".json") as f:
+            return json.load(f)
+    except OSError:
+        return {}
+
+# Road-like graph (Dijkstra format): a square grid with edges to the right and down neighbours, weights
+#   1..100, from one corner to the opposite one. Long shortest paths, many ties in the explored order
+def road_grid(file_path, size, seed):
+    rng = random.Random(seed)
+    side = max(2, math.isqrt(max(size, 2) // 2))
+
+    def rows():
+        for r in range(side):
+            for c in range(side):
+                v = r * side + c + 1
+                if c + 1 < side:
+                    yield v, v + 1, 1 + int(rng.random() * 100)
+                if r + 1 < side:
+                    yield v, v + side, 1 + int(rng.random() * 100)
+    write_rows(file_path, [[side * side], [1, side * side]], rows())
+
+# Random sparse graph (Dijkstra format): size edges between random endpoints among size / 4 vertices,
+#   weights 1..1000. The two query vertices may end up in different components
+def random_sparse(file_path, size, seed):
+    rng = random.Random(seed)
+    n = max(2, size // 4)
+    rows = ((1 + int(rng.random() * n), 1 + int(rng.random() * n), 1 + int(rng.random() * 1000)) for _ in range(size))
+    write_rows(file_path, [[n], [1, n]], rows)
+
+# Layered flow network (max-flow format): the source feeds every vertex of the first layer, every vertex
+#   sends arcs to 4 random vertices of the next layer, and the last layer drains into the sink.
+#   Capacities 1..100
+def layered_flow(file_path, size, seed):
+    rng = random.Random(seed)
+    degree = 4
+    width = max(2, math.isqrt(max(size, 4) // degree))
+    layers = max(2, size // (width * degree))
+    source, sink = 1, layers * width + 2
+
+    def rows():
+        for i in range(width):
+            yield source, 2 + i, 1 + int(rng.random() * 100)
+        for layer in range(layers - 1):
+            first, following = 2 + layer * width, 2 + (layer + 1) * width
+            for i in range(width):
+                for j in rng.sample(range(width), min(degree, width)):
+                    yield first + i, following + j, 1 + int(rng.random() * 100)
+        for i in range(width):
+            yield 2 + (layers - 1) * width + i, sink, 1 + int(rng.random() * 100)
+    write_rows(file_path, [[sink], [source, sink]], rows())
+
+# Dense min-cut instance (min-cut format) with a planted answer: two complete halves of about
+#   sqrt(size) vertices each, joined by a few light edges (weights 1..10, total C). Every edge inside a
+#   half weighs more than C, so any other cut costs more and the minimum cut weight is exactly C.
+#   Vertex labels are shuffled so the halves aren't contiguous
+def dense_mincut(file_path, size, seed):
+    rng = random.Random(seed)
+    half = max(2, math.isqrt(max(size, 4)))
+    n = 2 * half
+    labels = list(range(1, n + 1))
+    rng.shuffle(labels)
+    left, right = labels[:half], labels[half:]
+    cross = {(rng.choice(left), rng.choice(right)) for _ in range(max(1, half // 4))}
+    cross = [(u, v, 1 + int(rng.random() * 10)) for u, v in sorted(cross)]
+    cut_weight = sum(w for _, _, w in cross)
+
+    def rows():
+        yield from cross
+        for part in (left, right):
+            for i in range(len(part)):
+                for j in range(i + 1, len(part)):
+                    yield part[i], part[j], cut_weight + 1 + int(rng.random() * cut_weight)
+    write_rows(file_path, [[n]], rows())
+    write_facts(file_path, {"cut_weight": cut_weight})
+
+# Zipf-distributed symbol table (Huffman format): symbol i gets frequency round(10^6 / i^1.1) + 1, in
+#   shuffled order. The long tail has lots of equal frequencies
+def zipf_symbols(file_path, size, seed):
+    rng = random.Random(seed)
+    order = array('q', range(1, size + 1))
+    rng.shuffle(order)
+    write_rows(file_path, [[size]], ((f"s{i}", round(1e6 / i ** 1.1) + 1) for i in order))
+
+# Long power series (coefficient format): degree 8, k = 10 and m = size. a0 = 1 and the other
+#   coefficients are small, so the power and the reciprocal stay well inside float range
+def power_series(file_path, size, seed):
+    rng = random.Random(seed)
+    degree, k = 8, 10
+    coefficients = [1.0] + [round((rng.random() - 0.5) / degree, 8) for _ in range(degree)]
+    write_rows(file_path, [[degree, k, size]], ((f"{c:.8f}",) for c in coefficients))
+
+# Binomial power (coefficients format): (1 + x)^k with k = m = size, kept within 130..1000, so the
+#   k-th power's coefficients span up to 300 orders of magnitude (C(1000, 500) is about 10^299, still a
+#   float). Saves k, for checking every coefficient against C(k, i)
+def binomial_series(file_path, size, seed):
+    k = min(max(size, 130), 1000)
+    write_rows(file_path, [[1, k, k]], [("1.00000000",), ("1.00000000",)])
+    write_facts(file_path, {"binomial_k": k})
+
+# Geometric reciprocal (coefficients format): 1 - r x with m = size, k = 10 and r = 10^(100 / size)
+#   (to 8 decimals), so the reciprocal's coefficients r^i grow to about 10^100. Saves r, for checking
+#   the reciprocal against r^i
+def geometric_series(file_path, size, seed):
+    ratio = float(f"{10 ** (100 / size):.8f}")
+    write_rows(file_path, [[1, 10, size]], [("1.00000000",), (f"{-ratio:.8f}",)])
+    write_facts(file_path, {"ratio": ratio})
+
+# Dense reciprocal (coefficients format): a_i = r^i for every i up to n = m = size, with k = 2 and
+#   r = 0.5^(1 / size), so the last coefficient is about 0.5. The reciprocal is just 1 - r x (up to
+#   rounding), but every Newton step multiplies dense series. Coefficients are written in full, and r
+#   is saved for the check
+def dense_series(file_path, size, seed):
+    ratio = 0.5 ** (1 / size)
+    write_rows(file_path, [[size, 2, size]], ((f"{ratio ** i!r}",) for i in range(size + 1)))
+    write_facts(file_path, {"reciprocal_ratio": ratio})
+
+# Dense compositional inverse (coefficients format): a = x exp(-c x) with n = m = size, k = 2 and
+#   c = 0.999 / e, i.e. a_i = (-c)^(i - 1) / (i - 1)!. Its inverse is the tree function
+#   g_i = i^(i - 1) c^(i - 1) / i!, dense, with coefficients falling like 0.999^i / i^1.5. Saves c, for
+#   checking the inverse against g_i
+def dense_inverse_series(file_path, size, seed):
+    scale = 0.999 / math.e
+
+    def coefficients():
+        yield 0.0
+        term = 1.0
+        for i in range(1, size + 1):
+            yield term
+            term *= -scale / i
+    write_rows(file_path, [[size, 2, size]], ((f"{c!r}",) for c in coefficients()))
+    write_facts(file_path, {"inverse_scale": scale})
+
+# Multigraph with an Eulerian tour (Eulerian format): one random closed walk of size steps over
+#   size / 5 vertices (self-loops and repeated edges included), so every degree is even and the edges
+#   are connected. The edges are written in shuffled order and direction
+def eulerian_walk(file_path, size, seed):
+    rng = random.Random(seed)
+    n = max(3, size // 5)
+    walk = array('q', [1])
+    walk.extend(1 + int(rng.random() * n) for _ in range(size - 1))
+    walk.append(1)
+    order = array('q', range(size))  # Step i is the edge walk[i] - walk[i + 1]
+    rng.shuffle(order)
+    rows = ((walk[i], walk[i + 1]) if rng.random() < 0.5 else (walk[i + 1], walk[i]) for i in order)
+    write_rows(file_path, [[n]], rows)
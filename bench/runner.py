@@ -0,0 +1,178 @@
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Run as python -m bench.runner from the top of the repo, or as a plain script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.cases import CACHE_SUFFIXES, CASES, CASES_BY_NAME, load_script
+from common.stats import Stats
+
+try:
+    import resource  # Peak memory; not on Windows
+except ImportError:
+    resource = None
+
+DEFAULT_SIZES = "100,1000,10000"
+DEFAULT_WORK_DIR = os.path.join(tempfile.gettempdir(), "apm5663_bench")
+MIN_TIME_CHANGE = 0.05  # Seconds; smaller slowdowns are noise, whatever the ratio
+MIN_MEMORY_CHANGE = 10.0  # MB, same for memory
+
+# Function to get this process's peak resident memory in MB (None where it can't be measured). On Linux
+#   this is VmHWM: ru_maxrss would also count the parent's peak, which survives fork and exec
+def peak_memory_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024  # KiB
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KiB elsewhere
+
+# Function to run one case on one input, in a fresh worker process (see run_isolated). Returns the wall
+#   time of the whole run (parse, solve and write), the peak memory of the process, and the counters
+#   and per-phase timers from the program's stats
+def run_case(case_name, input_file, output_file):
+    case = CASES_BY_NAME[case_name]
+    module = load_script(case.solver)
+    stats = Stats(case.name, input=os.path.basename(input_file))
+    start = time.perf_counter()
+    case.run(module, input_file, output_file, stats)
+    seconds = time.perf_counter() - start
+    return {"time": round(seconds, 6), "peak_mb": peak_memory_mb(), "counters": stats.counters,
+            "timers": {phase: round(t, 6) for phase, t in stats.timers.items()}}
+
+# Function to run a case in a new process of its own ("spawn", not a fork of this one), so its peak
+#   memory is its own and nothing is left warm from the previous case
+def run_isolated(case_name, input_file, output_file):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, case_name, input_file, output_file).result()
+
+# Function to get the input for a generator, size and seed, generating it on first use
+def get_input(work_dir, generator, size, seed):
+    input_file = os.path.join(work_dir, "inputs", f"{generator.__name__}_{size}_{seed}.txt")
+    if not os.path.exists(input_file):
+        os.makedirs(os.path.dirname(input_file), exist_ok=True)
+        generator(input_file, size, seed)
+    return input_file
+
+# Function to delete the files the programs cache next to an input (CACHE_SUFFIXES)
+def clear_caches(input_file):
+    for suffix in CACHE_SUFFIXES:
+        if os.path.exists(input_file + suffix):
+            os.remove(input_file + suffix)
+
+# Function to compare a result with its baseline. Returns (regressions, notes): slower or bigger by more
+#   than tolerance (and than MIN_TIME_CHANGE / MIN_MEMORY_CHANGE) is a regression; changed counters are
+#   only noted, they change whenever the algorithm does
+def compare(result, baseline, tolerance):
+    if baseline is None:
+        return [], ["no baseline"]
+    regressions, notes = [], []
+    if result["time"] > baseline["time"] * (1 + tolerance) and result["time"] - baseline["time"] > MIN_TIME_CHANGE:
+        regressions.append(f"time {baseline['time']:.3f}s -> {result['time']:.3f}s")
+    peak, base_peak = result.get("peak_mb"), baseline.get("peak_mb")
+    if peak is not None and base_peak is not None and peak > base_peak * (1 + tolerance) and peak - base_peak > MIN_MEMORY_CHANGE:
+        regressions.append(f"memory {base_peak:.1f} -> {peak:.1f} MB")
+    if result["counters"] != baseline.get("counters"):
+        notes.append("counters changed")
+    return regressions, notes
+
+# Function to run the benchmarks: every selected case at every size, smallest sizes first. Returns
+#   {case: {size: result}} (sizes as strings, as in the JSON files) and whether anything failed a check
+#   or regressed against the baseline
+def run_benchmarks(cases, sizes, seed, work_dir, check_limit=10 ** 6, baseline=None, tolerance=0.25, keep_caches=False):
+    results = {}
+    failed = False
+    print(f"{'case':<22} {'size':>9} {'time':>10} {'peak':>10}  check / baseline")
+    for size in sizes:
+        outputs = {}  # Output of each case already run at this size, for the cases that compare with it
+        for case in cases:
+            input_file = get_input(work_dir, case.generator, size, seed)
+            output_file = os.path.join(work_dir, "outputs", f"{case.name}_{size}_{seed}.txt")
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            if not keep_caches:
+                clear_caches(input_file)
+            result = run_isolated(case.name, input_file, output_file)
+            outputs[case.name] = output_file
+
+            if size > check_limit:
+                result["check"] = "skipped"
+            else:
+                reference_output = None
+                if case.reference is not None:
+                    if case.reference not in outputs:  # Reference not selected: run it, untimed
+                        reference_output = os.path.join(work_dir, "outputs", f"{case.reference}_{size}_{seed}.txt")
+                        if not keep_caches:
+                            clear_caches(input_file)
+                        run_isolated(case.reference, input_file, reference_output)
+                        outputs[case.reference] = reference_output
+                    reference_output = outputs[case.reference]
+                problem = case.check(input_file, output_file, reference_output)
+                result["check"] = "ok" if problem is None else f"FAILED: {problem}"
+                failed = failed or problem is not None
+            results.setdefault(case.name, {})[str(size)] = result
+
+            regressions, notes = [], []
+            if baseline is not None:
+                regressions, notes = compare(result, baseline.get(case.name, {}).get(str(size)), tolerance)
+                failed = failed or bool(regressions)
+            peak = "-" if result["peak_mb"] is None else f"{result['peak_mb']:.1f} MB"
+            flags = "; ".join(["REGRESSION: " + r for r in regressions] + notes)
+            print(f"{case.name:<22} {size:>9} {result['time']:>9.3f}s {peak:>10}  {result['check']}"
+                  + (f" / {flags}" if flags else ""), flush=True)
+    return results, failed
+
+# Function to pick the cases matching any of the patterns (case names or shell-style wildcards such as
+#   "flow.*"); all cases without patterns
+def select_cases(patterns):
+    if not patterns:
+        return list(CASES)
+    cases = [case for case in CASES if any(fnmatch.fnmatchcase(case.name, p) for p in patterns)]
+    if not cases:
+        raise ValueError(f"no case matches {' '.join(patterns)} (see --list)")
+    return cases
+
+# Entry point for the program
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the programs on generated inputs.")
+    parser.add_argument("cases", nargs="*", help="cases to run, names or wildcards like 'flow.*' (default: all)")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma separated sizes, e.g. 1e2,1e5,1e7 (default {DEFAULT_SIZES})")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the generated inputs")
+    parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="where generated inputs and outputs are kept")
+    parser.add_argument("--check-limit", type=float, default=1e6, help="skip the checks above this size")
+    parser.add_argument("--keep-caches", action="store_true", help="keep the programs' caches between runs (warm runs)")
+    parser.add_argument("--baseline", help="compare with the results saved in this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown or memory growth allowed against the baseline")
+    parser.add_argument("--save", metavar="FILE", help="save the results to this file (to use as a baseline later)")
+    args = parser.parse_args()
+    if args.list:
+        for case in CASES:
+            print(f"{case.name:<22} {case.solver:<13} {case.generator.__name__:<14} "
+                  + (f"checked against {case.reference}" if case.reference else ""))
+        sys.exit(0)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        if saved.get("seed") != args.seed:
+            print(f"warning: the baseline was made with seed {saved.get('seed')}, not {args.seed}")
+        baseline = saved["results"]
+    sizes = sorted(int(float(size)) for size in args.sizes.split(","))
+    results, failed = run_benchmarks(select_cases(args.cases), sizes, args.seed, args.work_dir, args.check_limit,
+                                     baseline, args.tolerance, args.keep_caches)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({"seed": args.seed, "results": results}, f, indent=1, sort_keys=True)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,3 @@
+# Helpers shared by the graph programs in this repo (final/, midterm/, regular Assignments/).
+#   The programs are run as plain scripts from their own folders, so each one adds the repo root to
+#   sys.path before importing from here.
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from common.stats import new_stats
+
+# Manifest kept in each output directory: for every input file, what its output was made from
+MANIFEST_NAME = ".batch_manifest.json"
+
+# Function to name an output file the way most of the scripts do: sample.txt -> sample_output.txt
+def default_output_name(file_name):
+    return file_name.replace(".txt", "_output.txt")
+
+# Function to get a version string for a solver: a hash of its source file(s), of every module in this
+#   package (the shared parser, graph cache and stats all feed the outputs) and of any options that change
+#   the output (e.g. the engine). Editing any of them changes the version, so old outputs get redone
+def source_version(*paths, options=""):
+    h = hashlib.sha256(options.encode())
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    shared = sorted(os.path.join(package_dir, name) for name in os.listdir(package_dir) if name.endswith(".py"))
+    for path in list(paths) + shared:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+# Function to hash a file's contents, reading it 1 MiB at a time
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# Function to load the manifest, {} if there is none (or it can't be read)
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Function to save the manifest. Written to a temporary file first, so a reader never sees half of it
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    os.replace(temp_path, path)
+
+# Function to run one input file, in a worker or in this process. The output goes to a temporary file
+#   that replaces the real one only when the solver is done, so an output is never half written.
+#   Returns the stats, which the parent writes (so workers never append to the same file)
+def _run_one(process, solver, input_file, output_file, stats_file):
+    stats = new_stats(solver, input_file, stats_file)
+    temp_file = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        process(input_file, temp_file, stats=stats)
+        os.replace(temp_file, output_file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    return stats
+
+# Function to run process(input_file, output_file, stats=...) on every .txt file in input_dir.
+#   - Inputs whose contents and solver version match the manifest, and whose output still exists, are
+#     skipped. Contents are only rehashed when a file's size or modification time changed.
+#   - The rest run across a process pool (processes=None: one per CPU, 1: in this process), largest file
+#     first, so a big file started last doesn't hold up the end of the run.
+#   - With stats_file set, one JSON line of stats per file that ran is appended to it.
+#   process must be a module-level function (or functools.partial of one) so the pool can pickle it.
+#   force=True redoes every file. Returns the number of files that ran
+def run_batch(input_dir, output_dir, process, solver, version, stats_file=None, processes=None,
+              force=False, output_name=default_output_name):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir)
+    pending = []  # (size, file name, manifest entry)
+    for file_name in os.listdir(input_dir):
+        if not file_name.endswith(".txt"):
+            continue
+        input_file = os.path.join(input_dir, file_name)
+        info = os.stat(input_file)
+        entry = manifest.get(file_name)
+        if entry and entry["size"] == info.st_size and entry["mtime_ns"] == info.st_mtime_ns:
+            digest = entry["sha256"]
+        else:
+            digest = file_digest(input_file)
+        new_entry = {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": digest,
+                     "solver": solver, "version": version, "output": output_name(file_name)}
+        if (entry and entry["sha256"] == digest and entry["solver"] == solver and entry["version"] == version
+                and os.path.exists(os.path.join(output_dir, new_entry["output"]))):
+            manifest[file_name] = new_entry  # Unchanged; only the size/time might be new
+            continue
+        manifest.pop(file_name, None)  # Not valid until it has run again
+        pending.append((info.st_size, file_name, new_entry))
+    pending.sort(key=lambda item: (-item[0], item[1]))
+
+    def finished(file_name, entry, stats):
+        manifest[file_name] = entry
+        stats.write(stats_file)
+
+    try:
+        if processes == 1 or len(pending) <= 1:
+            for _, file_name, entry in pending:
+                finished(file_name, entry, _run_one(process, solver, os.path.join(input_dir, file_name),
+                                                    os.path.join(output_dir, entry["output"]), stats_file))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = {pool.submit(_run_one, process, solver, os.path.join(input_dir, file_name),
+                                       os.path.join(output_dir, entry["output"]), stats_file): (file_name, entry)
+                           for _, file_name, entry in pending}
+                for future in as_completed(futures):
+                    finished(*futures[future], future.result())
+    finally:
+        save_manifest(output_dir, manifest)  # Also after an error, so finished files aren't redone
+    return len(pending)
@@ -0,0 +1,146 @@
+import mmap
+import warnings
+from array import array
+
+# NumPy is optional, it only makes parsing and CSR construction faster
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bytes parsed per step. A chunk always ends on a line break, so no edge is split between chunks
+CHUNK_SIZE = 1 << 22
+
+# Edges stored column by column as typed arrays ('q', 8 bytes per value) instead of one tuple per edge.
+#   Iterating still yields one tuple per edge, so code written for a list of tuples keeps working
+class EdgeColumns:
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __iter__(self):
+        return zip(*self.columns)
+
+    def __getitem__(self, index):
+        return tuple(column[index] for column in self.columns)
+
+# Function to turn edges (an EdgeColumns or any iterable of tuples) into num_columns typed arrays
+def as_columns(edges, num_columns):
+    if isinstance(edges, EdgeColumns):
+        return edges.columns
+    columns = [array('q') for _ in range(num_columns)]
+    for edge in edges:
+        for column, value in zip(columns, edge):
+            column.append(value)
+    return columns
+
+# Function to parse whitespace separated integers from a chunk of bytes and append them, column by
+#   column, to columns. Returns the values that didn't make up a whole row, to go in front of the next chunk
+def _parse_chunk(chunk, columns):
+    num_columns = len(columns)
+    if np is not None:
+        # fromstring only warns (and stops early) on bad input, make that an error instead
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                values = np.fromstring(chunk, dtype=np.int64, sep=' ')
+            except DeprecationWarning as error:
+                raise ValueError(f"could not parse edge list: {error}") from None
+        usable = len(values) - len(values) % num_columns
+        rows = values[:usable].reshape(-1, num_columns)
+        for i, column in enumerate(columns):
+            column.frombytes(memoryview(np.ascontiguousarray(rows[:, i])).cast("B"))
+        rest = values[usable:].tolist()
+    else:
+        flat = array('q', map(int, chunk.split()))
+        usable = len(flat) - len(flat) % num_columns
+        for i, column in enumerate(columns):
+            column.extend(flat[i:usable:num_columns])
+        rest = flat[usable:]
+    return " ".join(map(str, rest)).encode()
+
+# Function to read an edge list file: header_lines lines of integers (e.g. the vertex count, or the
+#   start and end vertices), then one edge of num_columns integers per line. The file is memory-mapped
+#   and parsed in chunks straight into typed arrays, so no per-edge Python objects are ever made.
+#   Returns the header (a list of int lists, one per line) and the edges as EdgeColumns.
+def read_edge_list(file_path, header_lines=1, num_columns=3):
+    columns = [array('q') for _ in range(num_columns)]
+    with open(file_path, 'rb') as f:
+        header = [list(map(int, f.readline().split())) for _ in range(header_lines)]
+        position = f.tell()
+        f.seek(0, 2)
+        if f.tell() == position:
+            return header, EdgeColumns(columns)  # Header only, mmap can't map what isn't there
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            leftover = b""  # Values that didn't make up a whole edge, carried into the next chunk
+            while position < size:
+                end = min(position + CHUNK_SIZE, size)
+                if end < size:
+                    line_end = data.rfind(b'\n', position, end)
+                    if line_end == -1:
+                        line_end = data.find(b'\n', end)  # A single line longer than a chunk
+                    end = size if line_end == -1 else line_end + 1
+                chunk = data[position:end]
+                leftover = _parse_chunk(leftover + b" " + chunk if leftover else chunk, columns)
+                position = end
+            if leftover:
+                raise ValueError(f"{file_path}: edge list ends with an incomplete edge")
+    return header, EdgeColumns(columns)
+
+# Function to copy an int64 NumPy array into an array('q')
+def to_array(values):
+    arr = array('q')
+    arr.frombytes(memoryview(np.ascontiguousarray(values, dtype=np.int64)).cast("B"))
+    return arr
+
+# Function to build the CSR (compressed sparse row) adjacency of an undirected graph with vertices
+#   0..num_vertices. Every edge (u, v) gives an arc u->v and an arc v->u, and each vertex lists its arcs
+#   in input order, the same order appending to per-vertex lists would give. The arcs of u are
+#   offsets[u]:offsets[u + 1]; targets holds the other endpoint, edge_ids the index of the edge, and
+#   weights (only if w is given) the edge weight.
+def build_csr(num_vertices, u, v, w=None):
+    num_edges = len(u)
+    if np is not None and num_edges:
+        us = np.frombuffer(u, dtype=np.int64)
+        vs = np.frombuffer(v, dtype=np.int64)
+        # Arc 2e is u->v and arc 2e + 1 is v->u; a stable sort by source keeps input order per vertex
+        sources = np.empty(2 * num_edges, dtype=np.int64)
+        sources[0::2], sources[1::2] = us, vs
+        counts = np.bincount(sources, minlength=num_vertices + 1)
+        order = np.argsort(sources, kind='stable')
+        del sources
+        ends = np.empty(2 * num_edges, dtype=np.int64)
+        ends[0::2], ends[1::2] = vs, us
+        targets = to_array(ends[order])
+        del ends
+        order //= 2
+        weights = to_array(np.frombuffer(w, dtype=np.int64)[order]) if w is not None else None
+        offsets = np.zeros(num_vertices + 2, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return to_array(offsets), targets, weights, to_array(order)
+
+    # Plain counting sort: degrees, prefix sum, then drop every arc into its slot
+    offsets = [0] * (num_vertices + 2)
+    for x in u:
+        offsets[x + 1] += 1
+    for x in v:
+        offsets[x + 1] += 1
+    for i in range(1, num_vertices + 2):
+        offsets[i] += offsets[i - 1]
+    fill = offsets[:]
+    targets = array('q', bytes(8 * 2 * num_edges))
+    edge_ids = array('q', bytes(8 * 2 * num_edges))
+    weights = array('q', bytes(8 * 2 * num_edges)) if w is not None else None
+    for e in range(num_edges):
+        a, b = u[e], v[e]
+        for source, target in ((a, b), (b, a)):
+            slot = fill[source]
+            targets[slot] = target
+            edge_ids[slot] = e
+            if weights is not None:
+                weights[slot] = w[e]
+            fill[source] = slot + 1
+    return array('q', offsets), targets, weights, edge_ids
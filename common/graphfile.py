@@ -0,0 +1,194 @@
+import hashlib
+import mmap
+import os
+import sys
+from array import array
+
+from common.edgelist import EdgeColumns, build_csr, read_edge_list
+
+# Binary graph file, cached next to the text input (sample.txt -> sample.txt.graph). Everything after the
+#   magic is little-endian int64, so every array starts 8-byte aligned and can be used straight from
+#   the memory map:
+#     magic (8 bytes), then version, header_lines, num_columns, num_edges, csr_vertices (-1: no CSR),
+#       has_weights, source size, source mtime_ns
+#     SHA-256 of the source text (32 bytes)
+#     length of each header line, then the header values
+#     the edge columns, num_edges values each
+#     with CSR (see build_csr): offsets (csr_vertices + 2), targets, edge_ids and, if has_weights,
+#       weights (2 num_edges values each)
+#   Bump GRAPH_VERSION whenever the layout or the parsing changes, older files are then rebuilt
+GRAPH_MAGIC = b"APMGRAPH"
+GRAPH_VERSION = 1
+GRAPH_SUFFIX = ".graph"
+_FIELDS = 8  # int64 fields after the magic
+
+# A parsed graph: the text file's header lines and edge columns, plus its CSR adjacency if asked for.
+#   Loaded from a cache file, the arrays are memoryviews of the memory map (nothing is copied, and
+#   processes loading the same file share its pages) and path is that file; otherwise they are
+#   array('q') and path is None
+class GraphFile:
+    def __init__(self, header, edges, num_vertices=None, offsets=None, targets=None, edge_ids=None, weights=None, path=None):
+        self.header = header
+        self.edges = edges
+        self.num_vertices = num_vertices  # Vertices 0..num_vertices in the CSR, None without CSR
+        self.offsets = offsets
+        self.targets = targets
+        self.edge_ids = edge_ids
+        self.weights = weights
+        self.path = path
+
+# Function to get the bytes of an int64 array (or memoryview) in little-endian order
+def _little_endian(values):
+    if sys.byteorder == "little":
+        return memoryview(values).cast("B")
+    swapped = array('q', values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+# Function to hash the text file
+def _source_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+# Function to write a graph file. Written to a temporary file first, so a reader never sees half a graph
+def write_graph_file(path, graph, source_path):
+    info = os.stat(source_path)
+    columns = graph.edges.columns
+    has_csr = graph.offsets is not None
+    fields = array('q', [GRAPH_VERSION, len(graph.header), len(columns), len(graph.edges),
+                         graph.num_vertices if has_csr else -1, int(graph.weights is not None),
+                         info.st_size, info.st_mtime_ns])
+    arrays = list(columns)
+    if has_csr:
+        arrays += [graph.offsets, graph.targets, graph.edge_ids]
+        if graph.weights is not None:
+            arrays.append(graph.weights)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(GRAPH_MAGIC)
+            f.write(_little_endian(fields))
+            f.write(_source_digest(source_path))
+            for values in ([len(line) for line in graph.header], [x for line in graph.header for x in line]):
+                f.write(_little_endian(array('q', values)))
+            for values in arrays:
+                f.write(_little_endian(values))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+# Function to open a graph file. Returns the GraphFile and the source fields (size, mtime_ns, digest),
+#   or None if the file is missing, isn't a graph file or has another version
+def open_graph_file(path):
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(GRAPH_MAGIC)) != GRAPH_MAGIC:
+                return None
+            fields = array('q')
+            fields.fromfile(f, _FIELDS)
+            if sys.byteorder != "little":
+                fields.byteswap()
+            if fields[0] != GRAPH_VERSION:
+                return None
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, EOFError, ValueError):
+        return None
+    _, header_lines, num_columns, num_edges, csr_vertices, has_weights, size, mtime_ns = fields
+    if min(header_lines, num_columns, num_edges) < 0 or len(data) % 8:
+        return None  # Corrupt, or cut short partway through a value
+    digest_start = len(GRAPH_MAGIC) + 8 * _FIELDS
+    digest = data[digest_start:digest_start + 32]
+    if sys.byteorder == "little":
+        values = memoryview(data).cast("q")
+    else:  # No zero-copy on a big-endian machine: copy and swap once
+        values = array('q', data)
+        values.byteswap()
+    position = (digest_start + 32) // 8
+
+    def take(count):
+        nonlocal position
+        position += count
+        return values[position - count:position]
+
+    lengths = take(header_lines)
+    if any(length < 0 for length in lengths):
+        return None
+    flat = list(take(sum(lengths)))
+    header = []
+    for length in lengths:
+        header.append(flat[:length])
+        flat = flat[length:]
+    graph = GraphFile(header, EdgeColumns([take(num_edges) for _ in range(num_columns)]), path=path)
+    if csr_vertices >= 0:
+        graph.num_vertices = csr_vertices
+        graph.offsets = take(csr_vertices + 2)
+        graph.targets = take(2 * num_edges)
+        graph.edge_ids = take(2 * num_edges)
+        graph.weights = take(2 * num_edges) if has_weights else None
+    if 8 * position != len(data):
+        return None  # Cut short (or too long), don't trust any of it
+    return graph, (size, mtime_ns, digest)
+
+# Function to record a new modification time for the source in a graph file's header, in place (the
+#   contents already matched by SHA-256), so the next load trusts the time again instead of rehashing
+def _update_source_mtime(path, mtime_ns):
+    try:
+        with open(path, 'r+b') as f:
+            f.seek(len(GRAPH_MAGIC) + 8 * (_FIELDS - 1))
+            f.write(_little_endian(array('q', [mtime_ns])))
+    except OSError:
+        pass  # e.g. a read-only input directory; the digest still matches next time
+
+# Function to read an edge list file (see read_edge_list) through its binary cache. The first call parses
+#   the text and saves GRAPH_SUFFIX next to it; later calls map that file instead, as long as the text
+#   has the same size and either the same modification time or the same SHA-256. csr=True also builds
+#   (and caches) the CSR adjacency over vertices 0..max(first header value, largest vertex), weighted by
+#   the third column if there is one (see add_csr). If the cache can't be written the graph is just returned
+def load_graph(file_path, header_lines=1, num_columns=3, csr=False, cache=True):
+    cache_path = file_path + GRAPH_SUFFIX
+    if cache:
+        cached = open_graph_file(cache_path)
+        if cached is not None:
+            graph, (size, mtime_ns, digest) = cached
+            info = os.stat(file_path)
+            if (len(graph.header) == header_lines and len(graph.edges.columns) == num_columns
+                    and (graph.offsets is not None or not csr) and size == info.st_size):
+                if mtime_ns == info.st_mtime_ns:
+                    return graph
+                if digest == _source_digest(file_path):  # Touched but unchanged
+                    _update_source_mtime(cache_path, info.st_mtime_ns)
+                    return graph
+
+    graph = GraphFile(*read_edge_list(file_path, header_lines, num_columns))
+    if csr:
+        return add_csr(graph, file_path, cache)
+    if cache:
+        _save_graph(graph, file_path)
+    return graph
+
+# Function to give a graph from load_graph its CSR adjacency (as csr=True builds it) if it has none yet,
+#   and save it in the cache next to file_path. For programs that only need the adjacency once the edge
+#   columns have passed a check, so rejected inputs never build or cache it
+def add_csr(graph, file_path, cache=True):
+    if graph.offsets is not None:
+        return graph
+    u, v = graph.edges.columns[:2]
+    header = graph.header
+    n = max(header[0][0] if header and header[0] else 0, max(u, default=0), max(v, default=0))
+    w = graph.edges.columns[2] if len(graph.edges.columns) > 2 else None
+    graph.num_vertices = n
+    graph.offsets, graph.targets, graph.weights, graph.edge_ids = build_csr(n, u, v, w)
+    if cache:
+        _save_graph(graph, file_path)
+    return graph
+
+# Function to save a graph in the cache next to its text file, if it can be written
+def _save_graph(graph, file_path):
+    try:
+        write_graph_file(file_path + GRAPH_SUFFIX, graph, file_path)
+    except OSError:
+        pass  # e.g. a read-only input directory
@@ -0,0 +1,83 @@
+import json
+import os
+import time
+
+# Set this environment variable to a file path to record stats for a whole run, one JSON line per input
+#   file. Nothing is counted or timed when it is unset
+STATS_ENV = "APM5663_STATS"
+
+# Counters and per-phase wall-clock timers for one solver run. Solvers keep their counts in plain local
+#   ints inside the hot loops and add them here once at the end, so a disabled run (NULL_STATS) costs
+#   one no-op call per phase, not one per heap pop
+class Stats:
+    enabled = True
+
+    def __init__(self, solver, **labels):
+        self.solver = solver
+        self.labels = labels  # Extra fields for the JSON line, e.g. input="sample1.txt"
+        self.counters = {}
+        self.timers = {}
+
+    # Function to add amount to a counter
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Function to time a phase: with stats.timer("solve"): ... Time adds up if a phase runs more than once
+    def timer(self, phase):
+        return _Timer(self, phase)
+
+    def as_dict(self):
+        return {"solver": self.solver, **self.labels, "counters": self.counters,
+                "timers": {phase: round(seconds, 6) for phase, seconds in self.timers.items()}}
+
+    # Function to append the stats as one JSON line to file_path
+    def write(self, file_path):
+        with open(file_path, 'a') as f:
+            f.write(json.dumps(self.as_dict()) + "\n")
+
+class _Timer:
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timers = self.stats.timers
+        timers[self.phase] = timers.get(self.phase, 0.0) + time.perf_counter() - self.start
+        return False
+
+# Stand-in used when stats are off: every call does nothing
+class _NullStats:
+    enabled = False
+
+    def count(self, name, amount=1):
+        pass
+
+    def timer(self, phase):
+        return _NULL_TIMER
+
+    def write(self, file_path):
+        pass
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+NULL_STATS = _NullStats()
+
+# Function to get the stats file for this run from APM5663_STATS (None = stats off)
+def stats_file_from_env():
+    return os.environ.get(STATS_ENV) or None
+
+# Function to make the stats object for one input file: a real Stats if stats_file is set, else NULL_STATS
+def new_stats(solver, input_file, stats_file):
+    if not stats_file:
+        return NULL_STATS
+    return Stats(solver, input=os.path.basename(input_file))
@@ -1,136 +1,435 @@
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import heapq
+import math
 import os
+import random
+import sys
+
+# The shared edge-list parser lives in common/ at the top of the repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.batch import run_batch, source_version
+from common.graphfile import load_graph
+from common.stats import NULL_STATS, stats_file_from_env
+
+# NumPy is optional, it is only needed for the dense weight-matrix backend
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Graphs with at least this fraction of all possible edges (and enough vertices to be worth the
+#   setup) are solved on a V x V weight matrix instead of the adjacency dicts
+DENSE_EDGE_DENSITY = 0.25
+DENSE_MIN_VERTICES = 64
 
 # External Reference (Explanation of Stoer-Wagner Algorithm in a Java implementation blog post)
 # ------------------
 # https://blog.thomasjungblut.com/graph/mincut/mincut/
+#
+# Karger-Stein (randomized recursive contraction):
+# https://en.wikipedia.org/wiki/Karger%27s_algorithm#Karger%E2%80%93Stein_algorithm
 
-def run_stoer_wagner(input_file, output_file):
-    graph, original_edges = read_graph_from_file(input_file)
-    partition, min_cut_weight, _ = compute_min_cut(graph)
-    other_side = set(graph) - partition
+# Stats (see common/stats.py) get parse, solve and write times plus the solver's own counters
+def run_stoer_wagner(input_file, output_file, stats=NULL_STATS):
+    with stats.timer("parse"):
+        graph, original_edges = read_graph_from_file(input_file)
+    with stats.timer("solve"):
+        partition, min_cut_weight, _ = compute_min_cut(graph, stats)
+        other_side = set(graph) - partition
+        cut_edges = find_cut_edges(original_edges, partition, other_side)
+    with stats.timer("write"):
+        write_output_file(output_file, partition, other_side, cut_edges, min_cut_weight)
 
-    # Recompute cut edges from the original edges:
+# Same as run_stoer_wagner, but with the randomized Karger-Stein engine
+def run_karger_stein(input_file, output_file, success_probability=0.99, seed=None, processes=None, stats=NULL_STATS):
+    with stats.timer("parse"):
+        graph, original_edges = read_graph_from_file(input_file)
+    with stats.timer("solve"):
+        partition, min_cut_weight, _ = compute_min_cut_karger_stein(graph, success_probability, seed, processes, stats)
+        other_side = set(graph) - partition
+        cut_edges = find_cut_edges(original_edges, partition, other_side)
+    with stats.timer("write"):
+        write_output_file(output_file, partition, other_side, cut_edges, min_cut_weight)
+
+# Def to recompute the cut edges from the original edges
+def find_cut_edges(original_edges, partition, other_side):
     cut_edges = set()
     for (u, v, w) in original_edges:
         # If one endpoint is in the partition and the other is not, it's a cut edge
         if (u in partition and v in other_side) or (v in partition and u in other_side):
             cut_edges.add((min(u, v), max(u, v), w))
+    return cut_edges
 
-    write_output_file(output_file, partition, other_side, cut_edges, min_cut_weight)
-
-def merge_vertices(g, s, t, merged_vertices):
-    # Ensure both s and t are initialized in merged_vertices
-    if s not in merged_vertices:
-        merged_vertices[s] = {s}
-    if t not in merged_vertices:
-        merged_vertices[t] = {t}
-    
-    # Merge vertex sets
-    merged_vertices[s].update(merged_vertices[t])
-    del merged_vertices[t]
-
-    new_graph = defaultdict(list)
-    for v, edges in g.items():
-        for dest, weight in edges:
-            # Redirect edges involving t to s
-            if dest == t:
-                dest = s
-            if v == t:
-                v = s
-            if v != dest:  # Avoid self-loops
-                new_graph[v].append((dest, weight))
-    
-    # Combine parallel edges
-    for v, edges in new_graph.items():
-        combined = defaultdict(int)
+# Def to merge t into s, in place. Only t's adjacency is walked, so this costs O(deg(t))
+#   instead of rebuilding the whole graph. Parallel edges are combined as they are redirected,
+#   and the s-t edge is dropped (it would become a self-loop)
+def merge_vertices(g, s, t, merge_log):
+    # Record the merge, the vertex sets are only rebuilt once at the end (see expand_partition)
+    merge_log.append((s, t))
+
+    s_edges = g[s]
+    for dest, weight in g.pop(t).items():
+        if dest == s:
+            continue
+        # Redirect the edge t-dest to s-dest, combining with an existing s-dest edge
+        s_edges[dest] = s_edges.get(dest, 0) + weight
+        dest_edges = g[dest]
+        dest_edges[s] = dest_edges.get(s, 0) + weight
+        del dest_edges[t]
+    s_edges.pop(t, None)
+
+    return g
+
+# Def to expand a set of super-vertices back into original vertices, replaying the first
+#   num_merges entries of the merge log as a union-find (t always hangs under s)
+def expand_partition(vertices, partition, merge_log, num_merges):
+    parent = {}
+    for s, t in merge_log[:num_merges]:
+        parent[t] = s
+
+    def find(v):
+        root = v
+        while root in parent:
+            root = parent[root]
+        # Path compression, so each vertex is only walked up once
+        while v != root:
+            parent[v], v = root, parent[v]
+        return root
+
+    return {v for v in vertices if find(v) in partition}
+
+# Def to build the contracted-graph form: {v: {neighbor: combined weight}}, self-loops dropped
+def build_weighted_adjacency(graph):
+    g = {}
+    for v, edges in graph.items():
+        combined = g.setdefault(v, {})
         for dest, weight in edges:
-            combined[dest] += weight
-        new_graph[v] = [(dest, weight) for dest, weight in combined.items()]
+            if dest != v:
+                combined[dest] = combined.get(dest, 0) + weight
+    return g
 
-    # Remove self-loops
-    for v in new_graph:
-        new_graph[v] = [(dest, weight) for dest, weight in new_graph[v] if dest != v]
+# Def to decide if a graph should use the dense (NumPy matrix) backend
+def use_dense_backend(graph):
+    n = len(graph)
+    if np is None or n < DENSE_MIN_VERTICES:
+        return False
+    num_edges = sum(len(edges) for edges in graph.values()) / 2  # Parallel edges counted, good enough
+    return num_edges >= DENSE_EDGE_DENSITY * n * (n - 1) / 2
 
-    return new_graph
 # Def to compute the min cut, just sets it up. 
-def compute_min_cut(graph):
-    merged_vertices = {v: {v} for v in graph}
+#   Stats: phases, heap pushes/pops in the searches, and contraction cost (edges redirected by merges)
+def compute_min_cut(graph, stats=NULL_STATS):
+    if use_dense_backend(graph):
+        return compute_min_cut_dense(graph, stats)
+
+    merge_log = []  # (s, t) for every contraction, in order
     best_cut_weight = float('inf')
     best_partition = set()
-    best_merged_snapshot = None
+    best_phase = 0  # Number of merges done before the best phase
 
     # Def to find the maximum adjacency search (Ordered valid pair)
-    def maximum_adjacency_search(g):
+    #   A max-heap (negated weights) replaces the linear scan over all candidates. Entries are
+    #   never decreased in place, a vertex is just pushed again with its new weight and the stale
+    #   entries are skipped when popped. Ties go to the smaller vertex, same as before.
+    def maximum_adjacency_search(g, start):
         visited = set()
         order = []
-        weights = defaultdict(int)
-        start = next(iter(g))
+        weights = {}
+        heap = []
+        pushes = pops = 0
         visited.add(start)
         order.append(start)
         current = start
 
         # Iteratively add the vertex with the highest weight, this is our "Valid Ordered pair" we discussed in class, but as an adjacency list
         for _ in range(len(g)-1):
-            for neighbor, w in g[current]:
+            for neighbor, w in g[current].items():
                 if neighbor not in visited:
-                    weights[neighbor] += w
-            # Find the vertex with the highest weight
-            candidates = [(v, weights[v]) for v in weights if v not in visited]
-            if not candidates:
+                    weight = weights.get(neighbor, 0) + w
+                    weights[neighbor] = weight
+                    heapq.heappush(heap, (-weight, neighbor))
+                    pushes += 1
+            # Pop until we hit a vertex that is not already in the ordering
+            while heap and heap[0][1] in visited:
+                heapq.heappop(heap)
+                pops += 1
+            if not heap:
                 break
-            max_vertex = max(candidates, key=lambda x: (x[1], -x[0]))[0]
+            max_vertex = heapq.heappop(heap)[1]
+            pops += 1
 
             visited.add(max_vertex)
             order.append(max_vertex)
             current = max_vertex
+        stats.count("heap_pushes", pushes)
+        stats.count("heap_pops", pops)
+        if len(order) < len(g):
+            # The heap ran dry with vertices left: nothing joins the visited ones to the rest, a cut of weight 0
+            return None, None, 0, order
         # Grab the last two vertices in the order
         s, t = order[-2], order[-1]
-        cut_weight = weights[t]
+        cut_weight = weights.get(t, 0)
         return s, t, cut_weight, order[:-1]
 
-    # Copy the original graph to mutate
-    local_graph = {k: list(v) for k,v in graph.items()}
+    # Build the mutable, contracted form of the graph
+    with stats.timer("build"):
+        local_graph = build_weighted_adjacency(graph)
+    # Each phase starts from the same vertex; if it gets merged away the merged vertex takes its place
+    start = next(iter(local_graph), None)
 
     while len(local_graph) > 1:
-        s, t, cut_weight, order = maximum_adjacency_search(local_graph)
+        with stats.timer("search"):
+            s, t, cut_weight, order = maximum_adjacency_search(local_graph, start)
+        stats.count("phases")
 
         # Current partition from this phase
         partition = set(order)
+        if t is None:
+            # Disconnected: the part the search reached is a zero weight cut, nothing can beat it
+            best_cut_weight, best_partition, best_phase = 0, partition, len(merge_log)
+            break
 
         if cut_weight < best_cut_weight:
             best_cut_weight = cut_weight
-            best_partition = partition.copy()
-            best_merged_snapshot = {k: set(v) for k,v in merged_vertices.items()}
+            best_partition = partition  # Fresh set every phase, no copy needed
+            best_phase = len(merge_log)
 
-        local_graph = merge_vertices(local_graph, s, t, merged_vertices)
+        stats.count("contraction_cost", len(local_graph[t]))
+        with stats.timer("contract"):
+            local_graph = merge_vertices(local_graph, s, t, merge_log)
+        if start == t:
+            start = s
 
-    # Reconstruct final partitions from the best snapshot
-    expanded_partition = set()
-    for v in best_partition:
-        expanded_partition.update(best_merged_snapshot.get(v, {v}))
-
-    # All vertices from the best snapshot
-    all_vertices = set()
-    for group in best_merged_snapshot.values():
-        all_vertices.update(group)
+    # Reconstruct the final partition by replaying the merges up to the best phase
+    with stats.timer("expand"):
+        expanded_partition = expand_partition(graph, best_partition, merge_log, best_phase)
 
     # Return the final partition, cut weight, and empty cut_edges (we'll recalc later)
     return expanded_partition, best_cut_weight, []
 
-# Def to read graph from file
+# Def to compute the min cut on a dense V x V weight matrix (needs NumPy). Same phases, tie-breaks
+#   and merge log as compute_min_cut, but a phase step is one row add plus an argmax over a
+#   masked key array, and a merge is a row add plus a column add.
+def compute_min_cut_dense(graph, stats=NULL_STATS):
+    stats.count("dense_backend")
+    # Sorted labels, so argmax picking the first index among ties picks the smaller vertex
+    labels = sorted(graph)
+    index = {v: i for i, v in enumerate(labels)}
+    n = len(labels)
+    integral = all(isinstance(w, int) for edges in graph.values() for _, w in edges)
+    weights = np.zeros((n, n), dtype=np.int64 if integral else np.float64)
+    for v, edges in graph.items():
+        i = index[v]
+        for dest, w in edges:
+            weights[i, index[dest]] += w
+    np.fill_diagonal(weights, 0)  # Drop self-loops
+    # Same as weights != 0 for non-negative weights, but keeps zero weight edges as adjacencies
+    adjacent = np.zeros((n, n), dtype=bool)
+    for v, edges in graph.items():
+        for dest, _ in edges:
+            adjacent[index[v], index[dest]] = True
+    np.fill_diagonal(adjacent, False)
+
+    merge_log = []
+    best_cut_weight = float('inf')
+    best_partition = set()
+    best_phase = 0
+    active = np.ones(n, dtype=bool)
+    start = index[next(iter(graph))] if n else None
+    # Keys stay hugely negative even after every remaining edge weight is added on top
+    excluded = -2 * (int(np.abs(weights).sum()) + 1)
+    cut_weights = np.zeros(n, dtype=weights.dtype)
+
+    for remaining in range(n, 1, -1):
+        stats.count("phases")
+        # Vertices already in the order (or merged away) get a key far below any real weight,
+        #   so a plain argmax skips them
+        keys = np.where(active, 0, excluded).astype(weights.dtype)
+        keys[start] = excluded
+        touched = None
+        order = [start]
+        current = start
+        for _ in range(remaining - 1):
+            keys += weights[current]
+            max_vertex = int(keys.argmax())
+            if keys[max_vertex] <= 0:
+                # Only zero weight candidates left, pick among the touched ones like the sparse search
+                if touched is None:
+                    touched = np.zeros(n, dtype=bool)
+                    for v in order:
+                        touched |= adjacent[v]
+                else:
+                    touched |= adjacent[current]
+                masked = np.where(touched & (keys >= 0), keys, -1)
+                max_vertex = int(masked.argmax())
+                if masked[max_vertex] < 0:
+                    break  # Nothing joins the rest to the vertices in the order
+            elif touched is not None:
+                touched |= adjacent[current]
+            cut_weights[max_vertex] = keys[max_vertex]
+            keys[max_vertex] = excluded
+            order.append(max_vertex)
+            current = max_vertex
+
+        if len(order) < remaining:
+            # Disconnected: the vertices in the order are a zero weight cut, as in compute_min_cut
+            best_cut_weight, best_phase = 0, len(merge_log)
+            best_partition = {labels[i] for i in order}
+            break
+        s, t = order[-2], order[-1]
+        cut_weight = cut_weights[t].item()
+        if cut_weight < best_cut_weight:
+            best_cut_weight = cut_weight
+            best_partition = {labels[i] for i in order[:-1]}
+            best_phase = len(merge_log)
+
+        # Contract t into s: row plus column add, then clear t and the s-s self-loop
+        merge_log.append((labels[s], labels[t]))
+        weights[s] += weights[t]
+        weights[:, s] += weights[:, t]
+        weights[t] = 0
+        weights[:, t] = 0
+        weights[s, s] = 0
+        adjacent[s] |= adjacent[t]
+        adjacent[:, s] |= adjacent[:, t]
+        adjacent[t] = False
+        adjacent[:, t] = False
+        adjacent[s, s] = False
+        active[t] = False
+        if start == t:
+            start = s
+
+    expanded_partition = expand_partition(graph, best_partition, merge_log, best_phase)
+    return expanded_partition, best_cut_weight, []
+
+# Def to randomly contract a multigraph down to target vertices (Karger's contraction).
+#   Picking edges one at a time with probability proportional to weight is the same as giving
+#   every edge an exponential clock with rate = weight and contracting in clock order, so one sort
+#   plus a union-find does the whole contraction. Returns the contracted edges (parallel edges
+#   combined, self-loops dropped) and a map from each vertex to the vertex it was merged into.
+def random_contraction(vertices, edges, target, rng):
+    keyed = []
+    for u, v, w in edges:
+        key = rng.expovariate(w) if w > 0 else float('inf')
+        keyed.append((key, u, v))
+    keyed.sort()
+
+    parent = {v: v for v in vertices}
+
+    def find(v):
+        root = v
+        while parent[root] != root:
+            root = parent[root]
+        while parent[v] != root:
+            parent[v], v = root, parent[v]
+        return root
+
+    remaining = len(vertices)
+    for _, u, v in keyed:
+        if remaining <= target:
+            break
+        ru, rv = find(u), find(v)
+        if ru != rv:
+            parent[rv] = ru
+            remaining -= 1
+
+    rep = {v: find(v) for v in vertices}
+    return relabel_edges(edges, rep), rep
+
+# Def to relabel edge endpoints through rep, combining parallel edges and dropping self-loops
+def relabel_edges(edges, rep):
+    combined = defaultdict(int)
+    for u, v, w in edges:
+        ru, rv = rep[u], rep[v]
+        if ru != rv:
+            combined[(ru, rv) if ru < rv else (rv, ru)] += w
+    return [(u, v, w) for (u, v), w in combined.items()]
+
+# Def to find the min cut of a small graph exactly, by trying every bipartition as a bitmask
+def brute_force_min_cut(vertices, edges):
+    vertices = list(vertices)
+    index = {v: i for i, v in enumerate(vertices)}
+    indexed_edges = [(index[u], index[v], w) for u, v, w in edges]
+    best_weight, best_mask = float('inf'), 0
+    # Leave vertices[0] out of every mask so each bipartition is only tried once
+    for mask in range(2, 1 << len(vertices), 2):
+        weight = sum(w for i, j, w in indexed_edges if (mask >> i ^ mask >> j) & 1)
+        if weight < best_weight:
+            best_weight, best_mask = weight, mask
+    return best_weight, {v for i, v in enumerate(vertices) if best_mask >> i & 1}
+
+# Def for one Karger-Stein run: contract to about n/sqrt(2) vertices twice independently,
+#   recurse on both, and keep the better cut. Returns the cut weight and one side of the cut.
+def karger_stein(vertices, edges, rng):
+    n = len(vertices)
+    if not edges:
+        # Disconnected (or a single vertex), any one vertex is a zero weight cut
+        return 0, set(list(vertices)[:1]) if n > 1 else set()
+    if n <= 6:
+        return brute_force_min_cut(vertices, edges)
+
+    target = math.ceil(1 + n / math.sqrt(2))
+    best_weight, best_side = float('inf'), set()
+    for _ in range(2):
+        contracted, rep = random_contraction(vertices, edges, target, rng)
+        weight, side = karger_stein(set(rep.values()), contracted, rng)
+        if weight < best_weight:
+            # Expand the side back to this level's vertices
+            best_weight, best_side = weight, {v for v in vertices if rep[v] in side}
+    return best_weight, best_side
+
+# Worker state, set once per process by the pool initializer so the graph isn't pickled per trial
+_trial_vertices = None
+_trial_edges = None
+
+def _init_trial_worker(vertices, edges):
+    global _trial_vertices, _trial_edges
+    _trial_vertices, _trial_edges = vertices, edges
+
+def _run_trial(trial_seed):
+    return karger_stein(_trial_vertices, _trial_edges, random.Random(trial_seed))
+
+# Def to compute the min cut with repeated Karger-Stein trials.
+#   One trial finds a given min cut with probability at least about 1/log2(n), so
+#   ln(1/(1 - success_probability)) * log2(n) trials find it with the requested probability.
+#   Trials are independent, so they run across a process pool and the smallest cut wins
+#   (ties go to the lowest trial number, so a fixed seed always gives the same answer).
+def compute_min_cut_karger_stein(graph, success_probability=0.99, seed=None, processes=None, stats=NULL_STATS):
+    vertices = set(graph)
+    if len(vertices) < 2:
+        return set(), float('inf'), []
+    # Combine parallel edges and drop self-loops once, up front
+    edges = relabel_edges([(u, v, w) for u in graph for v, w in graph[u] if u < v], {v: v for v in vertices})
+
+    n = len(vertices)
+    num_trials = max(1, math.ceil(math.log(1 / (1 - success_probability)) * max(1.0, math.log2(n))))
+    seeder = random.Random(seed)
+    trial_seeds = [seeder.getrandbits(64) for _ in range(num_trials)]
+    stats.count("trials", num_trials)
+
+    if processes == 1 or num_trials == 1:
+        results = [karger_stein(vertices, edges, random.Random(s)) for s in trial_seeds]
+    else:
+        workers = processes or os.cpu_count() or 1
+        chunksize = max(1, num_trials // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_trial_worker, initargs=(vertices, edges)) as pool:
+            results = list(pool.map(_run_trial, trial_seeds, chunksize=chunksize))
+
+    best_weight, best_side = min(results, key=lambda result: result[0])
+    # Same convention as compute_min_cut: return the side that does not hold the "last" vertex
+    return vertices - best_side, best_weight, []
+
+# Def to read graph from file. original_edges comes back as typed (u, v, weight) columns
+#   (see common/edgelist.py); iterating it still gives one (u, v, weight) tuple per edge. The parsed
+#   edges are cached in a binary file next to the input (see common/graphfile.py)
 def read_graph_from_file(file_path):
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-        num_vertices = int(lines[0].strip())
-        graph = defaultdict(list)
-        original_edges = []  # Keep track of all original edges
-
-        for line in lines[1:]:
-            u, v, weight = map(int, line.split())
-            graph[u].append((v, weight))
-            graph[v].append((u, weight))
-            original_edges.append((u, v, weight))
+    original_edges = load_graph(file_path, header_lines=1, num_columns=3).edges
+    graph = defaultdict(list)
+    for u, v, weight in original_edges:
+        graph[u].append((v, weight))
+        graph[v].append((u, weight))
 
     # Return the graph and the original edges
     return graph, original_edges
@@ -145,17 +444,22 @@ def write_output_file(file_path, partition, other_side, cut_edges, min_cut_weigh
         for u, v, w in cut_edges:
             f.write(f"Edge ({u}, {v}) with weight {w}\n")
 
-# Def function to process all files in a directory
-def process_all_files(input_dir, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    for file_name in os.listdir(input_dir):
-        if file_name.endswith(".txt"):
-            input_file = os.path.join(input_dir, file_name)
-            output_file = os.path.join(output_dir, file_name.replace(".txt", "_output.txt"))
-            run_stoer_wagner(input_file, output_file)
-            
+# Def function to run one input file with the chosen engine
+def process_file(input_file, output_file, engine="stoer_wagner", stats=NULL_STATS):
+    if engine == "karger_stein":
+        run_karger_stein(input_file, output_file, stats=stats)
+    else:
+        run_stoer_wagner(input_file, output_file, stats=stats)
+
+# Def function to process all files in a directory. Use engine="karger_stein" for the randomized solver.
+#   Runs through common/batch.py: files in parallel (processes), skipping those whose output is up to
+#   date unless force=True. With stats_file set, one JSON line of stats per file that ran is appended to it
+def process_all_files(input_dir, output_dir, engine="stoer_wagner", stats_file=None, processes=None, force=False):
+    run_batch(input_dir, output_dir, partial(process_file, engine=engine), "mincut." + engine,
+              source_version(__file__, options=engine), stats_file, processes, force)
+
 # Main function
 if __name__ == "__main__":
     input_dir = "Inputs"  # Replace with your input directory
     output_dir = "Outputs"  # Replace with your output directory
-    process_all_files(input_dir, output_dir)
\ No newline at end of file
+    process_all_files(input_dir, output_dir, stats_file=stats_file_from_env())  # APM5663_STATS=file turns on stats
\ No newline at end of file
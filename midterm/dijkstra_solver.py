@@ -1,66 +1,692 @@
 import os
+import sys
 import heapq
-from collections import defaultdict
+from bisect import insort
+import hashlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-# Function to read the graph from a file
+# The shared edge-list parser lives in common/ at the top of the repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.batch import file_digest, run_batch, source_version
+from common.edgelist import as_columns, build_csr
+from common.graphfile import load_graph, open_graph_file
+from common.stats import NULL_STATS, stats_file_from_env
+
+# Number of landmarks picked for ALT queries, and the file (next to the input) their tables are cached in
+NUM_LANDMARKS = 8
+LANDMARK_SUFFIX = ".landmarks"
+LANDMARK_MAGIC = b"ALT1"
+# Directory (next to the graph file) where batch mode caches shortest path trees
+TREE_CACHE_DIR = ".tree_cache"
+# Largest edge weight for which shortest_path uses Dial's buckets (one bucket per weight), see queue_kind
+DIAL_MAX_WEIGHT = 1000
+
+# Function to read the graph from a file. The edges come back as typed (u, v, w) columns, see common/edgelist.py
 def read_graph(filename):
-    with open(filename, 'r') as f:
-        # Get the number of vertices, start and end vertices, and the edges
-        num_vertices = int(f.readline().strip())
-        start_vertex, end_vertex = map(int, f.readline().strip().split())
-        edges = [tuple(map(int, line.split())) for line in f]
-    return num_vertices, start_vertex, end_vertex, edges
+    # Get the number of vertices, start and end vertices, and the edges
+    graph_file = read_graph_file(filename)
+    num_vertices = graph_file.header[0][0]
+    start_vertex, end_vertex = graph_file.header[1]
+    return num_vertices, start_vertex, end_vertex, graph_file.edges
 
-# Function to implement Dijkstra's algorithm
-def dijkstra(num_vertices, start_vertex, end_vertex, edges):
-    graph = defaultdict(list) # Adjacency list representation of the graph
-    # Create the graph
-    for u, v, w in edges:
-        graph[u].append((v, w))
-        graph[v].append((u, w))
-
-    # Dijkstra's algorithm, using a min heap
-    min_heap = [(0, start_vertex)]
-    distances = {i: float('inf') for i in range(1, num_vertices + 1)} # Initialize all distances to infinity
-    distances[start_vertex] = 0  # Distance from start vertex to itself is 0
-    previous = {i: None for i in range(1, num_vertices + 1)} # Initialize all previous vertices to None
-    explored = [] # List to store the explored vertices, start with it empty
-
-    # Main loop
-    while min_heap: # While the min heap is not empty
-        current_distance, current_vertex = heapq.heappop(min_heap)
-
-        # If the current vertex has already been explored, skip it
-        if current_vertex in explored:
-            continue
-
-        # Add the current vertex to the list of explored vertices
-        explored.append(current_vertex)
-
-        # If the current vertex is the end vertex, break
-        if current_vertex == end_vertex:
+# Function to read the graph with its CSR adjacency through the binary cache next to the input (see
+#   common/graphfile.py): only the first run parses the text, later runs map the cached arrays
+def read_graph_file(filename):
+    return load_graph(filename, header_lines=2, num_columns=3, csr=True)
+
+# Graph built once from the edge list and reused for any number of queries.
+#   The adjacency is stored in CSR form: the neighbors of vertex u are targets[offsets[u]:offsets[u + 1]]
+#   with matching weights. Per-query state (distances, previous, settled) lives in scratch lists that
+#   are sized once; instead of clearing them between queries, every entry carries the generation it was
+#   written in, and anything from an older generation counts as "unset".
+class Graph:
+    def __init__(self, num_vertices, edges):
+        u, v, w = as_columns(edges, 3)
+        # Vertices are 1..num_vertices, but size by the largest label too in case the header is off
+        n = max(num_vertices, max(u, default=0), max(v, default=0))
+        # Each vertex keeps its neighbors in input order, same as the old adjacency lists
+        offsets, targets, weights, _ = build_csr(n, u, v, w)
+        self._setup(n, offsets, targets, weights)
+        self._edge_weights = w
+
+    # Rebuild a Graph straight from its CSR arrays (used by worker processes, see solve_queries)
+    @classmethod
+    def from_csr(cls, num_vertices, offsets, targets, weights):
+        graph = cls.__new__(cls)
+        graph._setup(num_vertices, offsets, targets, weights)
+        return graph
+
+    # Make a Graph from read_graph_file's result, using its CSR arrays as they are (memory-mapped when
+    #   they come from the cache). The CSR is the one __init__ would build from the same edges
+    @classmethod
+    def from_graph_file(cls, graph_file):
+        graph = cls.from_csr(graph_file.num_vertices, graph_file.offsets, graph_file.targets, graph_file.weights)
+        graph.cache_path = graph_file.path
+        graph._edge_weights = graph_file.edges.columns[2]
+        return graph
+
+    def _setup(self, n, offsets, targets, weights):
+        self.num_vertices = n
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+        # Scratch buffers shared by all queries, see the note above the class
+        self._generation = 0
+        self._distance = [0] * (n + 1)
+        self._previous = [0] * (n + 1)
+        self._reached = [0] * (n + 1)  # Generation in which _distance/_previous were last set
+        self._settled = [0] * (n + 1)  # Generation in which the vertex was explored (visited bitmap)
+        self._backward = None  # Second set of buffers for the backward search, made on first use
+        self.cache_path = None  # Binary graph file the arrays are mapped from, if any
+        self._queue_kind = None  # Set by queue_kind() on first use, along with _max_weight
+        self._max_weight = None
+        self._edge_weights = weights  # One weight per edge (half the arcs) when the edge list is at hand
+
+    # Priority queue shortest_path runs on by default, picked once from the range of the edge weights
+    #   (always integers here): "dial" (circular buckets) when they are all in 0..DIAL_MAX_WEIGHT, and
+    #   "heap" (binary heap) otherwise. The radix heap ("radix") has to be asked for: in Python, moving
+    #   entries between its buckets costs more than heapq's C code once the weights are large
+    def queue_kind(self):
+        if self._queue_kind is None:
+            weights = self._edge_weights
+            self._max_weight = max(weights, default=0)
+            if self._max_weight <= DIAL_MAX_WEIGHT and min(weights, default=0) >= 0:
+                self._queue_kind = "dial"
+            else:
+                self._queue_kind = "heap"
+        return self._queue_kind
+
+    # Dijkstra's algorithm from start_vertex to end_vertex.
+    #   Returns the explored vertices (in the order they were explored) and the path, or None if
+    #   the two vertices lie in different components. Stats: queue pushes/pops, settled vertices, arcs scanned.
+    #   queue picks the priority queue ("dial", "radix" or "heap", default queue_kind()). Every queue
+    #   explores vertices by distance with ties broken by the smaller vertex, so the output (and the
+    #   counters) are the same whichever one runs
+    def shortest_path(self, start_vertex, end_vertex, stats=NULL_STATS, queue=None):
+        self._generation += 1
+        generation = self._generation
+        previous, reached = self._previous, self._reached
+
+        self._distance[start_vertex] = 0  # Distance from start vertex to itself is 0
+        previous[start_vertex] = None
+        reached[start_vertex] = generation
+        search = {"dial": self._dial_search, "radix": self._radix_search, "heap": self._heap_search}
+        explored = search[queue or self.queue_kind()](start_vertex, end_vertex, generation, stats)
+
+        # Reconstruct the path from start vertex to end vertex
+        if reached[end_vertex] != generation:
+            # The start and end vertices lie in different components, no path exists
+            return explored, None
+        path = []
+        vertex = end_vertex
+        while vertex is not None:
+            path.append(vertex)
+            vertex = previous[vertex]
+        path.reverse()
+
+        # Return the explored vertices and the path
+        return explored, path
+
+    # shortest_path's search with a binary heap of (distance, vertex) entries. Works for any weights
+    def _heap_search(self, start_vertex, end_vertex, generation, stats):
+        distance, previous = self._distance, self._previous
+        reached, settled = self._reached, self._settled
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        min_heap = [(0, start_vertex)]
+        explored = []  # The explored vertices, in order
+        pushes, pops, scanned = 1, 0, 0  # The start vertex is the first push
+
+        # Main loop
+        while min_heap: # While the min heap is not empty
+            current_distance, current_vertex = heapq.heappop(min_heap)
+            pops += 1
+
+            # If the current vertex has already been explored, skip it
+            if settled[current_vertex] == generation:
+                continue
+
+            # Add the current vertex to the list of explored vertices
+            settled[current_vertex] = generation
+            explored.append(current_vertex)
+
+            # If the current vertex is the end vertex, break
+            if current_vertex == end_vertex:
+                break
+
+            # Update the distances and previous vertices of the neighbors of the current vertex
+            scanned += offsets[current_vertex + 1] - offsets[current_vertex]
+            for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = targets[i]
+                new_distance = current_distance + weights[i]
+                if reached[neighbor] != generation or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    previous[neighbor] = current_vertex
+                    reached[neighbor] = generation
+                    heapq.heappush(min_heap, (new_distance, neighbor))
+                    pushes += 1
+        _count_search(stats, pushes, pops, len(explored), scanned)
+        return explored
+
+    # shortest_path's search with Dial's buckets, for weights 0..max_weight: bucket d % (max_weight + 1)
+    #   holds the vertices queued at distance d. Every queued distance lies in [d, d + max_weight] while
+    #   bucket d is being emptied, so the buckets never mix distances. Entries are plain vertex numbers;
+    #   the current bucket is sorted and read in order, so its vertices come out smallest first, same as
+    #   the (distance, vertex) heap. Only a zero weight edge adds to it on the way, in sorted position
+    def _dial_search(self, start_vertex, end_vertex, generation, stats):
+        distance, previous = self._distance, self._previous
+        reached, settled = self._reached, self._settled
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        self.queue_kind()  # Sets _max_weight
+        num_buckets = self._max_weight + 1
+        buckets = [[] for _ in range(num_buckets)]
+        buckets[0].append(start_vertex)
+        explored = []
+        pushes, pops, scanned = 1, 0, 0
+        current_distance = -1
+        found = False
+        while pops < pushes and not found:  # Until every entry (stale ones included) is popped
+            current_distance += 1
+            bucket = buckets[current_distance % num_buckets]
+            if not bucket:
+                continue
+            bucket.sort()
+            position = 0
+            while position < len(bucket):
+                current_vertex = bucket[position]
+                position += 1
+                pops += 1
+                # Explored already (at a smaller distance: this is a stale entry), skip it
+                if settled[current_vertex] == generation:
+                    continue
+                settled[current_vertex] = generation
+                explored.append(current_vertex)
+                if current_vertex == end_vertex:
+                    found = True
+                    break
+
+                scanned += offsets[current_vertex + 1] - offsets[current_vertex]
+                for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                    neighbor = targets[i]
+                    new_distance = current_distance + weights[i]
+                    if reached[neighbor] != generation or new_distance < distance[neighbor]:
+                        distance[neighbor] = new_distance
+                        previous[neighbor] = current_vertex
+                        reached[neighbor] = generation
+                        if new_distance == current_distance:
+                            insort(bucket, neighbor, position)
+                        else:
+                            buckets[new_distance % num_buckets].append(neighbor)
+                        pushes += 1
+            bucket.clear()
+        _count_search(stats, pushes, pops, len(explored), scanned)
+        return explored
+
+    # shortest_path's search with a radix heap, for non-negative weights of any size. Popped distances
+    #   never decrease, so a queued distance d is kept in bucket (d ^ last).bit_length(), where last is the
+    #   distance popped last: bucket 0 holds the vertices at distance last, read in sorted order as in
+    #   _dial_search. When bucket 0 runs out, the first non-empty bucket is spread over the lower ones
+    #   around its smallest distance, which becomes the new last; an entry only ever moves down
+    def _radix_search(self, start_vertex, end_vertex, generation, stats):
+        distance, previous = self._distance, self._previous
+        reached, settled = self._reached, self._settled
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        # Buckets 1..64 keep their distances and vertices in two lists, so no tuples are made
+        bucket_distances = [[] for _ in range(65)]
+        bucket_vertices = [[] for _ in range(65)]
+        nearest = [start_vertex]  # Bucket 0
+        position = 0  # Next vertex to read from nearest
+        last = 0
+        explored = []
+        pushes, pops, scanned = 1, 0, 0
+        while True:
+            if position == len(nearest):
+                b = 1
+                while b < 65 and not bucket_distances[b]:
+                    b += 1
+                if b == 65:
+                    break
+                distances, vertices = bucket_distances[b], bucket_vertices[b]
+                bucket_distances[b], bucket_vertices[b] = [], []
+                last = min(distances)
+                nearest, position = [], 0
+                for d, vertex in zip(distances, vertices):
+                    if d == last:
+                        nearest.append(vertex)
+                    else:
+                        lower = (d ^ last).bit_length()
+                        bucket_distances[lower].append(d)
+                        bucket_vertices[lower].append(vertex)
+                nearest.sort()
+
+            current_vertex = nearest[position]
+            position += 1
+            pops += 1
+            # Explored already (at a smaller distance: this is a stale entry), skip it
+            if settled[current_vertex] == generation:
+                continue
+            settled[current_vertex] = generation
+            explored.append(current_vertex)
+            if current_vertex == end_vertex:
+                break
+
+            scanned += offsets[current_vertex + 1] - offsets[current_vertex]
+            for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = targets[i]
+                new_distance = last + weights[i]
+                if reached[neighbor] != generation or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    previous[neighbor] = current_vertex
+                    reached[neighbor] = generation
+                    if new_distance == last:
+                        insort(nearest, neighbor, position)
+                    else:
+                        lower = (new_distance ^ last).bit_length()
+                        bucket_distances[lower].append(new_distance)
+                        bucket_vertices[lower].append(neighbor)
+                    pushes += 1
+        _count_search(stats, pushes, pops, len(explored), scanned)
+        return explored
+
+    # Content hash of the graph (vertex count and CSR arrays), used as the key of the tree cache
+    def digest(self):
+        h = hashlib.sha256()
+        h.update(array('q', [self.num_vertices]).tobytes())
+        for arr in (self.offsets, self.targets, self.weights):
+            h.update(arr.tobytes())
+        return h.hexdigest()
+
+    # Dijkstra's algorithm from source to every vertex. Returns the distances (-1 if unreachable) and the
+    #   previous vertex on each shortest path (0 for the source and unreachable vertices). The paths
+    #   match the ones shortest_path reports, since ties are broken the same way
+    def shortest_path_tree(self, source):
+        distances = array('q', [-1]) * (self.num_vertices + 1)
+        previous = array('q', [0]) * (self.num_vertices + 1)
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        distances[source] = 0
+        min_heap = [(0, source)]
+        while min_heap:
+            current_distance, current_vertex = heapq.heappop(min_heap)
+            if current_distance > distances[current_vertex]:
+                continue  # Stale heap entry
+            for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = targets[i]
+                new_distance = current_distance + weights[i]
+                if distances[neighbor] < 0 or new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current_vertex
+                    heapq.heappush(min_heap, (new_distance, neighbor))
+        return distances, previous
+
+    # Distances from source to every vertex, -1 if unreachable
+    def distances_from(self, source):
+        return self.shortest_path_tree(source)[0]
+
+    # Bidirectional Dijkstra: one search grows from the start, one from the end (the graph is
+    #   undirected, so both use the same adjacency), always advancing the side with the smaller heap top.
+    #   best_distance is the shortest start-end path seen where the two searches touch, and we stop once
+    #   the two heap tops add up to at least that. Explored holds the vertices settled by either side.
+    def bidirectional_path(self, start_vertex, end_vertex, stats=NULL_STATS):
+        if start_vertex == end_vertex:
+            return [start_vertex], [start_vertex]
+        if self._backward is None:
+            n = self.num_vertices
+            self._backward = ([0] * (n + 1), [0] * (n + 1), [0] * (n + 1), [0] * (n + 1))
+        self._generation += 1
+        generation = self._generation
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        # (distance, previous, reached, settled) for each side
+        sides = ((self._distance, self._previous, self._reached, self._settled), self._backward)
+        heaps = ([(0, start_vertex)], [(0, end_vertex)])
+        for side, vertex in ((sides[0], start_vertex), (sides[1], end_vertex)):
+            side[0][vertex] = 0
+            side[1][vertex] = None
+            side[2][vertex] = generation
+
+        explored = []
+        best_distance = None
+        meeting_edge = None
+        pushes, pops, settled_count, scanned = 2, 0, 0, 0  # Both end vertices start in a heap
+        while heaps[0] and heaps[1]:
+            if best_distance is not None and heaps[0][0][0] + heaps[1][0][0] >= best_distance:
+                break
+            # Advance the side whose next vertex is closer
+            this = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            distance, previous, reached, settled = sides[this]
+            other_distance, _, other_reached, other_settled = sides[1 - this]
+            current_distance, current_vertex = heapq.heappop(heaps[this])
+            pops += 1
+            if settled[current_vertex] == generation:
+                continue
+            settled[current_vertex] = generation
+            settled_count += 1
+            if other_settled[current_vertex] != generation:
+                explored.append(current_vertex)
+
+            scanned += offsets[current_vertex + 1] - offsets[current_vertex]
+            for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = targets[i]
+                new_distance = current_distance + weights[i]
+                if reached[neighbor] != generation or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    previous[neighbor] = current_vertex
+                    reached[neighbor] = generation
+                    heapq.heappush(heaps[this], (new_distance, neighbor))
+                    pushes += 1
+                # The edge joins the two searches, check the start-end path through it
+                if other_reached[neighbor] == generation:
+                    through = new_distance + other_distance[neighbor]
+                    if best_distance is None or through < best_distance:
+                        best_distance = through
+                        meeting_edge = (current_vertex, neighbor) if this == 0 else (neighbor, current_vertex)
+        _count_search(stats, pushes, pops, settled_count, scanned)
+
+        if best_distance is None:
+            return explored, None
+        # Forward path up to the meeting edge, then the backward path from it to the end
+        left, right = meeting_edge
+        path = []
+        vertex = left
+        while vertex is not None:
+            path.append(vertex)
+            vertex = sides[0][1][vertex]
+        path.reverse()
+        vertex = right
+        while vertex is not None:
+            path.append(vertex)
+            vertex = sides[1][1][vertex]
+        return explored, path
+
+    # ALT query: A* search where the estimate of the remaining distance from v to the end vertex comes
+    #   from the landmark tables and the triangle inequality, |d(L, end) - d(L, v)| <= d(v, end) for every
+    #   landmark L. The estimate never overshoots, so the first time the end vertex is explored its
+    #   distance is final, same as plain Dijkstra, but far fewer vertices get explored on the way.
+    def alt_path(self, start_vertex, end_vertex, landmarks, stats=NULL_STATS):
+        _, tables = landmarks
+        # Keep only landmarks that reach the end vertex, paired with their distance to it
+        to_end = [(table, table[end_vertex]) for table in tables if table[end_vertex] >= 0]
+
+        def estimate(vertex):
+            best = 0
+            for table, end_distance in to_end:
+                landmark_distance = table[vertex]
+                if landmark_distance >= 0:
+                    bound = end_distance - landmark_distance
+                    if bound < 0:
+                        bound = -bound
+                    if bound > best:
+                        best = bound
+            return best
+
+        self._generation += 1
+        generation = self._generation
+        distance, previous = self._distance, self._previous
+        reached, settled = self._reached, self._settled
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        distance[start_vertex] = 0
+        previous[start_vertex] = None
+        reached[start_vertex] = generation
+        min_heap = [(estimate(start_vertex), start_vertex)]
+        explored = []
+        pushes, pops, scanned = 1, 0, 0  # The start vertex is the first push
+        while min_heap:
+            _, current_vertex = heapq.heappop(min_heap)
+            pops += 1
+            if settled[current_vertex] == generation:
+                continue
+            settled[current_vertex] = generation
+            explored.append(current_vertex)
+            if current_vertex == end_vertex:
+                break
+            current_distance = distance[current_vertex]
+            scanned += offsets[current_vertex + 1] - offsets[current_vertex]
+            for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = targets[i]
+                new_distance = current_distance + weights[i]
+                if reached[neighbor] != generation or new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    previous[neighbor] = current_vertex
+                    reached[neighbor] = generation
+                    heapq.heappush(min_heap, (new_distance + estimate(neighbor), neighbor))
+                    pushes += 1
+        _count_search(stats, pushes, pops, len(explored), scanned)
+
+        if reached[end_vertex] != generation:
+            return explored, None
+        path = []
+        vertex = end_vertex
+        while vertex is not None:
+            path.append(vertex)
+            vertex = previous[vertex]
+        path.reverse()
+        return explored, path
+
+# Function to add one search's counters to stats (kept in local ints during the search)
+def _count_search(stats, pushes, pops, settled, scanned):
+    stats.count("heap_pushes", pushes)
+    stats.count("heap_pops", pops)
+    stats.count("settled", settled)
+    stats.count("arcs_scanned", scanned)
+
+# Function to pick landmarks for ALT with the "farthest" heuristic: each new landmark is the vertex
+#   farthest from all the landmarks picked so far (vertices the landmarks can't reach count as farthest,
+#   so every component gets one). Returns the landmark vertices and their distance tables.
+def select_landmarks(graph, num_landmarks=NUM_LANDMARKS):
+    n = graph.num_vertices
+    landmark_ids, tables = [], []
+    if n == 0:
+        return landmark_ids, tables
+    # Distance from each vertex to its closest landmark so far (-1 = no landmark reaches it).
+    #   Before the first pick, distances from vertex 1 are used, so the first landmark is far from it
+    closest = graph.distances_from(1)
+    for _ in range(min(num_landmarks, n)):
+        farthest, farthest_distance = None, -1
+        for v in range(1, n + 1):
+            if closest[v] < 0 and v not in landmark_ids:
+                farthest = v
+                break
+            if closest[v] > farthest_distance:
+                farthest, farthest_distance = v, closest[v]
+        if farthest is None or farthest in landmark_ids:
             break
+        table = graph.distances_from(farthest)
+        if not landmark_ids:
+            closest = array('q', table)
+        else:
+            for v in range(1, n + 1):
+                if table[v] >= 0 and (closest[v] < 0 or table[v] < closest[v]):
+                    closest[v] = table[v]
+        landmark_ids.append(farthest)
+        tables.append(table)
+    return landmark_ids, tables
+
+# Function to get the ALT landmarks for an input file: load them from the cache file next to the input
+#   if it was built from the same file contents, otherwise pick them now and save them there
+def get_landmarks(input_filepath, graph, num_landmarks=NUM_LANDMARKS):
+    digest = bytes.fromhex(file_digest(input_filepath))  # Read 1 MiB at a time
+    cache_filepath = input_filepath + LANDMARK_SUFFIX
+    landmarks = load_landmarks(cache_filepath, digest, graph.num_vertices)
+    if landmarks is None:
+        landmarks = select_landmarks(graph, num_landmarks)
+        save_landmarks(cache_filepath, digest, graph.num_vertices, landmarks)
+    return landmarks
+
+# Function to save landmark tables: magic, input digest, [num_vertices, num_landmarks], landmark ids, tables.
+#   Written to a temporary file first, so a reader never sees half a file. If it can't be written (e.g. a
+#   read-only input directory) the landmarks are just not cached
+def save_landmarks(filename, digest, num_vertices, landmarks):
+    landmark_ids, tables = landmarks
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(temp_filename, 'wb') as f:
+            f.write(LANDMARK_MAGIC)
+            f.write(digest)
+            array('q', [num_vertices, len(landmark_ids)]).tofile(f)
+            array('q', landmark_ids).tofile(f)
+            for table in tables:
+                table.tofile(f)
+        os.replace(temp_filename, filename)
+    except OSError:
+        pass
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+# Function to load landmark tables, returns None if the file is missing or was built from another input
+def load_landmarks(filename, digest, num_vertices):
+    try:
+        with open(filename, 'rb') as f:
+            if f.read(len(LANDMARK_MAGIC)) != LANDMARK_MAGIC or f.read(len(digest)) != digest:
+                return None
+            header = array('q')
+            header.fromfile(f, 2)
+            if header[0] != num_vertices:
+                return None
+            landmark_ids = array('q')
+            landmark_ids.fromfile(f, header[1])
+            tables = []
+            for _ in range(header[1]):
+                table = array('q')
+                table.fromfile(f, num_vertices + 1)
+                tables.append(table)
+    except (OSError, EOFError):
+        return None
+    return list(landmark_ids), tables
+
+# Function to read a batch query file: one "source target" pair per line
+def read_queries(filename):
+    with open(filename, 'r') as f:
+        return [tuple(map(int, line.split())) for line in f if line.strip()]
+
+# Function to get the file a shortest path tree is cached in. Trees are keyed by the graph digest and
+#   the source vertex, so a changed graph never picks up stale trees
+def tree_cache_path(cache_dir, graph_digest, source):
+    return os.path.join(cache_dir, graph_digest, f"{source}.tree")
 
-        # Update the distances and previous vertices of the neighbors of the current vertex
-        for neighbor, weight in graph[current_vertex]:
-            distance = current_distance + weight
-            if distance < distances[neighbor]:
-                distances[neighbor] = distance
-                previous[neighbor] = current_vertex
-                heapq.heappush(min_heap, (distance, neighbor))
-
-    # Reconstruct the path from start vertex to end vertex
-    path = []
-    if distances[end_vertex] != float('inf'): # If a path exists
-        while end_vertex is not None: # Reconstruct the path
-            path.insert(0, end_vertex)
-            end_vertex = previous[end_vertex]
-    # If the start and end vertices lie in different components, no path exists
-    else: 
-        path = None
-
-    # Return the explored vertices and the path
-    return explored, path
+# Function to load a cached tree, returns None if it is not cached
+def load_tree(filename, num_vertices):
+    try:
+        with open(filename, 'rb') as f:
+            distances, previous = array('q'), array('q')
+            distances.fromfile(f, num_vertices + 1)
+            previous.fromfile(f, num_vertices + 1)
+    except (OSError, EOFError):
+        return None
+    return distances, previous
+
+# Function to cache a tree. Written to a temporary file first, so a reader never sees half a tree
+def save_tree(filename, tree):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temp_filename = f"{filename}.{os.getpid()}.tmp"
+    with open(temp_filename, 'wb') as f:
+        tree[0].tofile(f)
+        tree[1].tofile(f)
+    os.replace(temp_filename, filename)
+
+# Worker state, set once per process by the pool initializer so the graph isn't pickled per task
+_worker_graph = None
+
+def _init_tree_worker(cache_path, num_vertices, offsets, targets, weights):
+    global _worker_graph
+    if cache_path is not None:  # Map the cached graph, all workers share its pages
+        _worker_graph = Graph.from_graph_file(open_graph_file(cache_path)[0])
+    else:
+        _worker_graph = Graph.from_csr(num_vertices, offsets, targets, weights)
+
+def _tree_worker(source):
+    return source, _worker_graph.shortest_path_tree(source)
+
+# Function to answer many (source, target) queries on one graph. Queries are grouped by source, so each
+#   shortest path tree is computed once; trees that aren't cached yet are computed across a process pool.
+#   Returns (source, target, distance, path) for every query, in query order, with distance and path
+#   None when there is no path
+def solve_queries(graph, queries, cache_dir=None, processes=None, stats=NULL_STATS):
+    by_source = {}
+    for index, (source, target) in enumerate(queries):
+        by_source.setdefault(source, []).append((index, target))
+    results = [None] * len(queries)
+    graph_digest = graph.digest() if cache_dir is not None else None
+
+    def answer(source, tree):
+        distances, previous = tree
+        for index, target in by_source[source]:
+            if distances[target] < 0:
+                results[index] = (source, target, None, None)
+                continue
+            path = [target]
+            while path[-1] != source:
+                path.append(previous[path[-1]])
+            path.reverse()
+            results[index] = (source, target, distances[target], path)
+
+    # Answer what the cache already has, collect the rest
+    missing = []
+    for source in by_source:
+        tree = None
+        if cache_dir is not None:
+            tree = load_tree(tree_cache_path(cache_dir, graph_digest, source), graph.num_vertices)
+        if tree is None:
+            missing.append(source)
+        else:
+            answer(source, tree)
+    stats.count("queries", len(queries))
+    stats.count("tree_cache_hits", len(by_source) - len(missing))
+    stats.count("trees_computed", len(missing))
+
+    # Trees are answered (and cached) as they arrive, so only a few are in memory at once
+    if processes == 1 or len(missing) <= 1:
+        computed = ((source, graph.shortest_path_tree(source)) for source in missing)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_tree_worker,
+                                   initargs=(graph.cache_path, None, None, None, None) if graph.cache_path else
+                                   (None, graph.num_vertices, graph.offsets, graph.targets, graph.weights))
+        computed = pool.map(_tree_worker, missing)
+    try:
+        for source, tree in computed:
+            if cache_dir is not None:
+                save_tree(tree_cache_path(cache_dir, graph_digest, source), tree)
+            answer(source, tree)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return results
+
+# Function to write the batch results, one block per query
+def write_batch_output(output_filename, results):
+    with open(output_filename, 'w') as f:
+        for source, target, distance, path in results:
+            f.write(f"Query {source} {target}:\n")
+            if path:
+                f.write(f"Minimum weight path (weight {distance}):\n")
+                f.write(" ".join(map(str, path)) + "\n")
+            else:
+                f.write("No path found, The start and ending vertices of desired path lie in different components.\n")
+
+# Function to run a batch: the graph file (same format as the regular inputs, its start/end line is
+#   ignored) plus a query file. Trees are cached in TREE_CACHE_DIR next to the graph file by default
+def process_query_file(graph_filepath, query_filepath, output_filepath, cache_dir=None, processes=None, stats=NULL_STATS):
+    with stats.timer("parse"):
+        graph_file = read_graph_file(graph_filepath)
+        queries = read_queries(query_filepath)
+    with stats.timer("solve"):
+        graph = Graph.from_graph_file(graph_file)
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(graph_filepath), TREE_CACHE_DIR)
+        results = solve_queries(graph, queries, cache_dir, processes, stats)
+    with stats.timer("write"):
+        write_batch_output(output_filepath, results)
+
+# Function to implement Dijkstra's algorithm for a single query. When running many queries on the
+#   same graph, build a Graph once and call shortest_path on it instead
+def dijkstra(num_vertices, start_vertex, end_vertex, edges):
+    return Graph(num_vertices, edges).shortest_path(start_vertex, end_vertex)
 
 # Function to write the output to a file
 def write_output(output_filename, explored, path):
@@ -73,24 +699,37 @@ def write_output(output_filename, explored, path):
         else:
             f.write("No path found, The start and ending vertices of desired path lie in different components.\n")
 
-# Main function to process a single file
-def process_file(input_filepath, output_filepath):
-    num_vertices, start_vertex, end_vertex, edges = read_graph(input_filepath)
-    explored, path = dijkstra(num_vertices, start_vertex, end_vertex, edges)
-    write_output(output_filepath, explored, path)
-
-# Function to process all files in the input directory
-def process_all_files(input_dir, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".txt"):  # Assuming input files have .txt extension
-            input_filepath = os.path.join(input_dir, filename)
-            output_filepath = os.path.join(output_dir, filename.replace(".txt", "_output.txt"))
-            process_file(input_filepath, output_filepath)
+# Main function to process a single file. mode is "dijkstra" (default), "bidirectional" or "alt".
+#   The path has the same weight in every mode, but the explored vertices (and, on ties, the path) differ.
+#   queue forces the priority queue of the "dijkstra" mode (see Graph.queue_kind); the output is the same.
+#   Stats (see common/stats.py) get parse, solve and write times plus the search counters
+def process_file(input_filepath, output_filepath, mode="dijkstra", stats=NULL_STATS, queue=None):
+    with stats.timer("parse"):
+        graph_file = read_graph_file(input_filepath)
+        start_vertex, end_vertex = graph_file.header[1]
+    with stats.timer("solve"):
+        with stats.timer("build"):
+            graph = Graph.from_graph_file(graph_file)
+        if mode == "bidirectional":
+            explored, path = graph.bidirectional_path(start_vertex, end_vertex, stats)
+        elif mode == "alt":
+            with stats.timer("landmarks"):
+                landmarks = get_landmarks(input_filepath, graph)
+            explored, path = graph.alt_path(start_vertex, end_vertex, landmarks, stats)
+        else:
+            explored, path = graph.shortest_path(start_vertex, end_vertex, stats, queue)
+    with stats.timer("write"):
+        write_output(output_filepath, explored, path)
+
+# Function to process all files in the input directory.
+#   Runs through common/batch.py: files in parallel (processes), skipping those whose output is up to
+#   date unless force=True. With stats_file set, one JSON line of stats per file that ran is appended to it
+def process_all_files(input_dir, output_dir, mode="dijkstra", stats_file=None, processes=None, force=False):
+    run_batch(input_dir, output_dir, partial(process_file, mode=mode), "dijkstra." + mode,
+              source_version(__file__, options=mode), stats_file, processes, force)
 
 # Driver code
 if __name__ == "__main__":
     input_dir = "Inputs"
     output_dir = "Outputs"
-    process_all_files(input_dir, output_dir)
\ No newline at end of file
+    process_all_files(input_dir, output_dir, stats_file=stats_file_from_env())  # APM5663_STATS=file turns on stats
\ No newline at end of file
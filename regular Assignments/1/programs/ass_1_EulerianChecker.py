@@ -1,113 +1,230 @@
 import os
-from collections import defaultdict
+import sys
+from array import array
 
-# Function to read the graph from a file. PRetty simple
+# The shared edge-list parser lives in common/ at the top of the repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.batch import run_batch, source_version
+from common.edgelist import as_columns, build_csr, to_array
+from common.graphfile import add_csr, load_graph
+from common.stats import NULL_STATS, stats_file_from_env
+
+# NumPy is optional, it only makes building the tour arrays faster
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Function to read the graph from a file. PRetty simple. The edges come back as typed (u, v) columns
+#   (see common/edgelist.py); iterating them still gives one tuple per edge
 def read_graph(filename):
-    with open(filename, 'r') as f:
-        num_vertices = int(f.readline().strip())
-        edges = [tuple(map(int, line.split())) for line in f]
-    return num_vertices, edges
-
-# Function to check if the graph is connected (ignoring isolated vertices)
-#   This function will perform a dfs, maybe another way is more efficent?
-def is_connected(graph, num_vertices):
-    visited = set()
-
-    # Find a vertex with a nonzero degree to start the search 
-    for v in range(1, num_vertices + 1):
-        if graph[v]:
-            start_vertex = v
-            break
+    graph_file = read_graph_file(filename)
+    num_vertices = graph_file.header[0][0]
+    return num_vertices, graph_file.edges
+
+# Function to read the graph through the binary cache next to the input (see common/graphfile.py): only
+#   the first run parses the text, later runs map the cached arrays. Just the edge columns, unless the
+#   cache already has the CSR adjacency; eulerian_trail adds it (add_csr) once the graph passes
+#   check_eulerian
+def read_graph_file(filename):
+    return load_graph(filename, header_lines=1, num_columns=2)
+
+# Function to check the two conditions for an Eulerian trail or tour straight from the edge columns,
+#   without building any adjacency: degree parities (one flag per vertex; np.bincount with NumPy) and
+#   connectivity of the vertices that have edges, with a union-find in an array (path halving, union by
+#   size). The union-find stops as soon as everything is in one component. Returns (connected, number of
+#   odd vertices). Stats: unions
+def check_eulerian(num_vertices, edges, stats=NULL_STATS):
+    u, v = as_columns(edges, 2)
+    size = vertex_count(num_vertices, u, v) + 1
+    if np is not None and len(u):
+        degrees = np.bincount(np.frombuffer(u, dtype=np.int64), minlength=size)
+        degrees += np.bincount(np.frombuffer(v, dtype=np.int64), minlength=size)
+        odd = int(np.count_nonzero(degrees & 1))
+        components = int(np.count_nonzero(degrees))
     else:
-        return True  # All vertices are isolated
-    
-    # Perform dfs to get connectivity, ensuring is is a connected graph. If not, 
-    #   then we'll return false
-    stack = [start_vertex]
-    while stack:
-        vertex = stack.pop()
-        if vertex not in visited:
-            visited.add(vertex)
-            for neighbor in graph[vertex]:
-                if neighbor not in visited:
-                    stack.append(neighbor)
-    
-    # Check if all vertices with edges are visited
-    for v in range(1, num_vertices + 1):
-        if graph[v] and v not in visited:
-            # Return false, so its not connected
-            return False
-    # Return true, so it is connected
-    return True
-
-# Function to find the degrees of vertices
-def get_degrees(graph):
-    degrees = defaultdict(int)
-    for v in graph:
-        for neighbor in graph[v]:
-            degrees[v] += 1
-    return degrees
+        parity = bytearray(size)
+        touched = bytearray(size)
+        for column in (u, v):
+            for x in column:
+                parity[x] ^= 1
+                touched[x] = 1
+        odd = parity.count(1)
+        components = touched.count(1)
+
+    # Each vertex with edges starts as its own component, every union joins two
+    parent = array('q', range(size))
+    sizes = array('q', [1]) * size
+    unions = 0
+    for a, b in zip(u, v):
+        if components <= 1:
+            break
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a != b:
+            if sizes[a] < sizes[b]:
+                a, b = b, a
+            parent[b] = a
+            sizes[a] += sizes[b]
+            components -= 1
+            unions += 1
+    stats.count("unions", unions)
+    return components <= 1, odd
+
+# Function to get the number of vertices to size the per-vertex arrays by: the header's count, or the
+#   largest label if an edge uses a bigger one (as Graph and ResidualGraph do in the other programs)
+def vertex_count(num_vertices, u, v):
+    return max(num_vertices, max(u, default=0), max(v, default=0))
+
+# Function to build the arrays Hierholzer's algorithm walks on, from the CSR adjacency (build_csr, each
+#   vertex's arcs in input order, the order appending to adjacency lists gives). For every arc:
+#   edge_ids gives its edge, twin the arc of the same edge at the other end, and first / following chain
+#   the arcs of one vertex that go to the same neighbour (parallel edges, self-loops), in list order.
+#   csr can pass in build_csr's result for these edges (e.g. the cached one from add_csr)
+def build_tour_arrays(num_vertices, edges, csr=None):
+    u, v = as_columns(edges, 2)
+    offsets, targets, _, edge_ids = csr or build_csr(num_vertices, u, v)
+    num_arcs = len(targets)
+    if np is not None and num_arcs:
+        ids = np.frombuffer(edge_ids, dtype=np.int64)
+        by_edge = np.argsort(ids, kind='stable').reshape(-1, 2)  # The two arcs of each edge
+        pair_sum = by_edge.sum(axis=1)
+        twin = to_array(pair_sum[ids] - np.arange(num_arcs))
+        owners = np.repeat(np.arange(num_vertices + 1), np.diff(np.frombuffer(offsets, dtype=np.int64)))
+        ends = np.frombuffer(targets, dtype=np.int64)
+        order = np.lexsort((ends, owners))  # Stable, so each (vertex, neighbour) run stays in list order
+        starts = np.ones(num_arcs, dtype=bool)
+        starts[1:] = (owners[order][1:] != owners[order][:-1]) | (ends[order][1:] != ends[order][:-1])
+        first = np.empty(num_arcs, dtype=np.int64)
+        first[order] = order[np.maximum.accumulate(np.where(starts, np.arange(num_arcs), 0))]
+        following = np.full(num_arcs, -1, dtype=np.int64)
+        following[order[:-1]] = np.where(starts[1:], -1, order[1:])
+        return offsets, targets, edge_ids, twin, to_array(first), to_array(following)
+
+    twin = array('q', bytes(8 * num_arcs))
+    seen = array('q', [-1]) * (len(u))  # First arc of each edge
+    for arc in range(num_arcs):
+        e = edge_ids[arc]
+        if seen[e] < 0:
+            seen[e] = arc
+        else:
+            twin[arc], twin[seen[e]] = seen[e], arc
+    first = array('q', bytes(8 * num_arcs))
+    following = array('q', [-1]) * num_arcs
+    for x in range(num_vertices + 1):
+        run_start, run_last = {}, {}
+        for arc in range(offsets[x], offsets[x + 1]):
+            y = targets[arc]
+            first[arc] = run_start.setdefault(y, arc)
+            if y in run_last:
+                following[run_last[y]] = arc
+            run_last[y] = arc
+    return offsets, targets, edge_ids, twin, first, following
 
 # Function to find an Eulerian path or tour using Hierholzer's algorithm. Pulled from a combination of class and the internet
 # https://medium.com/@yusufaksoyeng/finding-the-eulerian-cycle-with-hierholzers-algorithm-f60bb773db3c#:~:text=In%201873,%20Hierholzer%20proposed%20an%20algorithm%20to%20find%20the%20Eulerian
-def find_eulerian_path_or_tour(graph, num_vertices):
-    degrees = get_degrees(graph)
-    odd_vertices = [v for v, degree in degrees.items() if degree % 2 == 1]
+#   The walk takes the last unused arc of the current vertex v (a cursor moving down v's arcs) and then
+#   uses up the first unused arc back to v in the neighbour's list, the same choices as popping from and
+#   removing from adjacency lists, so the path comes out the same. A used-arc bitmap replaces the
+#   removals, so the whole walk is O(V + E). Stats: edge pops (each edge is popped once, from the vertex
+#   it is walked from). csr is passed on to build_tour_arrays, and must be built for vertex_count vertices
+def find_eulerian_path_or_tour(num_vertices, edges, stats=NULL_STATS, csr=None):
+    u, v = as_columns(edges, 2)
+    num_vertices = vertex_count(num_vertices, u, v)
+    offsets, targets, edge_ids, twin, first, following = build_tour_arrays(num_vertices, edges, csr)
+
+    # Odd vertices are taken in the order they first show up in the edge list (the order the adjacency
+    #   dict had): a vertex's first arc is its earliest edge, and an edge lists u before v
+    def first_seen(x):
+        e = edge_ids[offsets[x]]
+        return 2 * e + (u[e] != x)
+    odd_vertices = [x for x in range(num_vertices + 1) if (offsets[x + 1] - offsets[x]) % 2]
 
     if len(odd_vertices) == 0:
         # Eulerian tour (all vertices have even degrees)
-        start_vertex = next(v for v in range(1, num_vertices + 1) if graph[v])
+        start_vertex = next((x for x in range(1, num_vertices + 1) if offsets[x + 1] > offsets[x]), None)
+        if start_vertex is None:
+            return [], "closed", None  # No edges at all
         path_type = "closed"
     elif len(odd_vertices) == 2:
         # Eulerian trail (exactly two vertices have odd degrees)
-        start_vertex = odd_vertices[0]
+        start_vertex = min(odd_vertices, key=first_seen)
         path_type = "open"
     else:
         return None, None, "The graph has more than two vertices with odd degrees."
 
-    # Start setting up the path, stack, and local graph (Local graph being a copy of the graph)
+    # Walk with a stack, a cursor per vertex (its arcs not looked at yet end there), the used-arc bitmap,
+    #   and the first maybe-unused arc of each (vertex, neighbour) run (kept at the run's first arc)
     path = []
     stack = [start_vertex]
-    local_graph = defaultdict(list)
-    for v in graph:
-        local_graph[v] = list(graph[v])
-
-    # Utilize a stack to keep track of the path, and then pop off the stack to find the path
+    cursor = array('q', offsets[1:])
+    used = bytearray(len(targets))
+    head = array('q', range(len(targets)))
+    pops = 0
     while stack:
         # Current vertex
-        v = stack[-1] 
-        if local_graph[v]: # If there are still unexplored edges
-            u = local_graph[v].pop() # Remove the edge from the graph
-            local_graph[u].remove(v) # Remove the edge from the other vertex
-            stack.append(u) # Add the other vertex to the stack
+        v = stack[-1]
+        arc = cursor[v]
+        low = offsets[v]
+        while arc > low and used[arc - 1]:
+            arc -= 1
+        if arc > low: # If there are still unexplored edges
+            arc -= 1
+            cursor[v] = arc
+            used[arc] = 1
+            pops += 1
+            w = targets[arc]
+            # Use up the first unused arc back to v in w's list (the twin is one of that run)
+            run = first[twin[arc]]
+            back = head[run]
+            while used[back]:
+                back = following[back]
+            used[back] = 1
+            head[run] = back
+            stack.append(w) # Add the other vertex to the stack
         # If there are no more edges to explore
-        else: 
+        else:
+            cursor[v] = arc
             path.append(stack.pop()) # Add the vertex to the path
-    
-    # return thhe path as well as the path type, and no error message if good. 
+    stats.count("edge_pops", pops)
+
+    # return thhe path as well as the path type, and no error message if good.
     return path[::-1], path_type, None
 
-# Main function to determine Eulerian trail or tour
-def eulerian_trail(filename, output_filename):
-    num_vertices, edges = read_graph(filename)
+# Main function to determine Eulerian trail or tour. Stats (see common/stats.py) get parse, solve and
+#   write times plus the counters above
+def eulerian_trail(filename, output_filename, stats=NULL_STATS):
+    with stats.timer("parse"):
+        graph_file = read_graph_file(filename)
+        num_vertices, edges = graph_file.header[0][0], graph_file.edges
     
-    # Build adjacency list, this uses a defaultdict to make it easier to add edges since we don't have to check if the key exists
-    graph = defaultdict(list)
-    for u, v in edges:
-        graph[u].append(v)
-        graph[v].append(u)
+    with stats.timer("solve"):
+        # Check connectivity and degrees first on the edge columns; most inputs fail here, and then no
+        #   adjacency is ever built or cached
+        with stats.timer("feasibility"):
+            connected, odd = check_eulerian(num_vertices, edges, stats)
+        if connected and odd > 2:
+            path, error_message = None, "The graph has more than two vertices with odd degrees."
+        elif connected:
+            # The CSR is sized by the header's count or the largest label, whichever is bigger (vertex_count)
+            with stats.timer("csr"):
+                add_csr(graph_file, filename)
+            # Find the Eulerian path or tour
+            with stats.timer("hierholzer"):
+                csr = (graph_file.offsets, graph_file.targets, None, graph_file.edge_ids)
+                path, path_type, error_message = find_eulerian_path_or_tour(num_vertices, edges, stats, csr)
     
-    # Check if the graph is connected
-    if not is_connected(graph, num_vertices):
-        with open(output_filename, 'w') as f:
+    if not connected:
+        with stats.timer("write"), open(output_filename, 'w') as f:
             f.write("The graph is not connected, it has edges that reside in more than 1 component.\n")
         return
     
-    # Check for Eulerian path or tour
-    path, path_type, error_message = find_eulerian_path_or_tour(graph, num_vertices)
-    
     # Some basic processing here, open the file and write the output information
-    with open(output_filename, 'w') as f:
+    with stats.timer("write"), open(output_filename, 'w') as f:
         if path is None:
             f.write(f"No Eulerian trail. Reason: {error_message}\n")
         else:
@@ -117,19 +234,14 @@ def eulerian_trail(filename, output_filename):
                 f.write("The graph has an Eulerian trail (open).\n")
             f.write("The Eulerian path or tour is: " + " -> ".join(map(str, path)) + "\n")
 
-# Function to process all files in the input directory
-def process_all_files(input_dir, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    # Iterate over all files in the input directory, then just append "_output.txt" to the filename and set that as the output file
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".txt"):  # Assuming input files have .txt extension
-            input_filepath = os.path.join(input_dir, filename)
-            output_filepath = os.path.join(output_dir, filename.replace(".txt", "_output.txt"))
-            eulerian_trail(input_filepath, output_filepath)
+# Function to process all files in the input directory.
+#   Runs through common/batch.py: files in parallel (processes), skipping those whose output is up to
+#   date unless force=True. With stats_file set, one JSON line of stats per file that ran is appended to it
+def process_all_files(input_dir, output_dir, stats_file=None, processes=None, force=False):
+    run_batch(input_dir, output_dir, eulerian_trail, "eulerian", source_version(__file__), stats_file, processes, force)
 
 # Driver code, not much to see here
 if __name__ == "__main__":
     input_dir = "Inputs"
     output_dir = "Outputs"
-    process_all_files(input_dir, output_dir)
\ No newline at end of file
+    process_all_files(input_dir, output_dir, stats_file=stats_file_from_env())  # APM5663_STATS=file turns on stats
\ No newline at end of file
@@ -1,7 +1,33 @@
+import argparse
 import heapq
+import mmap
 import os
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# The shared stats helpers live in common/ at the top of the repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.batch import run_batch, source_version
+from common.stats import NULL_STATS, stats_file_from_env
+
+# NumPy is optional, it only makes compress_file's encoding faster
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_SIZE = 1 << 20  # Bytes read at a time when counting or compressing
+MIN_BYTES_PER_WORKER = 16 << 20  # Files are only split across processes in pieces at least this big
+DECODE_TABLE_BITS = 12  # Bits the decoder looks up at once, the table has 2 ** DECODE_TABLE_BITS entries
+REFILL_BYTES = 8  # Bytes the decoder adds to its bit buffer at a time
+COMPRESSED_MAGIC = b"HUF1"
 
 class Node:
+    __slots__ = ("symbol", "freq", "left", "right")  # No per-node __dict__, trees get big
+
     def __init__(self, symbol, freq):
         self.symbol = symbol  # The symbol represented by this node
         self.freq = freq      # The frequency of the symbol
@@ -22,10 +48,55 @@ def read_input_file(file_path):
             symbols_freq.append((symbol, float(freq)))  # Store as a tuple (symbol, frequency)
     return symbols_freq
 
-def build_huffman_tree(symbols_freq):
-    # Build the Huffman tree based on symbol frequencies
+# Function to count how often each byte value occurs in file_path[start:end], reading it CHUNK_SIZE
+#   bytes at a time into one reused buffer, so memory stays the same whatever the file size
+def count_byte_range(file_path, start, end):
+    frequencies = [0] * 256
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            size = f.readinto(view[:min(CHUNK_SIZE, remaining)])
+            if not size:
+                break
+            remaining -= size
+            if np is not None:
+                counts = np.bincount(np.frombuffer(buffer, dtype=np.uint8, count=size), minlength=256)
+                frequencies = [a + b for a, b in zip(frequencies, counts.tolist())]
+            else:
+                for value, freq in Counter(view[:size]).items():
+                    frequencies[value] += freq
+    return frequencies
+
+# Function to count byte frequencies of a whole file. Big files are split into one range per process,
+#   counted in parallel and the counts added up. Returns a list of 256 counts
+def count_byte_frequencies(file_path, processes=None):
+    size = os.path.getsize(file_path)
+    workers = min(processes or os.cpu_count() or 1, max(1, size // MIN_BYTES_PER_WORKER))
+    if workers <= 1:
+        return count_byte_range(file_path, 0, size)
+    bounds = [size * i // workers for i in range(workers + 1)]
+    frequencies = [0] * 256
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for counts in pool.map(count_byte_range, [file_path] * workers, bounds[:-1], bounds[1:]):
+            frequencies = [a + b for a, b in zip(frequencies, counts)]
+    return frequencies
+
+# Function to read a raw file (any bytes) as a symbol table: one (byte value, count) per byte that occurs,
+#   in the same form read_input_file gives
+def read_raw_file(file_path, processes=None):
+    return [(value, freq) for value, freq in enumerate(count_byte_frequencies(file_path, processes)) if freq]
+
+def build_huffman_tree(symbols_freq, stats=NULL_STATS):
+    # Build the Huffman tree based on symbol frequencies. Stats: heap pushes/pops and merges
     heap = [Node(symbol, freq) for symbol, freq in symbols_freq]  # Create nodes for each symbol
     heapq.heapify(heap)  # Convert list to a min-heap
+    merges = len(heap) - 1 if heap else 0  # Every merge is two pops and one push
+    stats.count("merges", merges)
+    stats.count("heap_pops", 2 * merges)
+    stats.count("heap_pushes", merges)
     
     while len(heap) > 1:
         # While there is more than one node in the heap
@@ -46,17 +117,118 @@ def generate_huffman_codes(root):
     generate_codes_helper(root, '', codes)  # Start generating codes from the root
     return codes 
 
-# recursive helper function to generate codes for each symbol
+# helper function to generate codes for each symbol. Uses its own stack instead of recursion, so a
+#   deep tree (very skewed frequencies) doesn't hit the recursion limit
 def generate_codes_helper(node, current_code, codes):
-    if node is None:
-        return
-    if node.symbol is not None:
-        codes[node.symbol] = current_code  # Assign code to the symbol
-    # Traverse left (add '0') and right (add '1') to generate codes
-    generate_codes_helper(node.left, current_code + '0', codes)
-    generate_codes_helper(node.right, current_code + '1', codes)
-
-def write_output_file(file_path, codes, symbols_freq):
+    stack = [(node, current_code)]
+    while stack:
+        node, current_code = stack.pop()
+        if node is None:
+            continue
+        if node.symbol is not None:
+            codes[node.symbol] = current_code  # Assign code to the symbol
+        # Traverse left (add '0') and right (add '1') to generate codes, left first
+        stack.append((node.right, current_code + '1'))
+        stack.append((node.left, current_code + '0'))
+
+# Function to compute the Huffman code lengths without building a tree of objects (two-queue method).
+#   The frequencies are sorted once; after that the two smallest nodes are always at the front of either
+#   the sorted leaves or the merged nodes, since merged nodes are made in non-decreasing order, so each
+#   merge is O(1). The tree lives in two parallel arrays over the 2n - 1 nodes (leaves first, merged nodes
+#   after): freq and parent. The code lengths (depths) are then filled in from the root down in one loop,
+#   reusing the parent array. Returns the code lengths in the same order as symbols_freq.
+#   Memory is about 3 arrays of 8 bytes per symbol, instead of a Node object per node
+def two_queue_code_lengths(symbols_freq, stats=NULL_STATS):
+    n = len(symbols_freq)
+    if n <= 1:
+        return [1] * n  # A lone symbol still needs a 1 bit code
+    order = sorted(range(n), key=lambda i: symbols_freq[i][1])
+    freq = array('d', [0.0]) * (2 * n - 1)
+    for node, i in enumerate(order):
+        freq[node] = symbols_freq[i][1]
+    parent = array('q', [0]) * (2 * n - 1)
+    leaf, merged = 0, n  # Front of the sorted leaves and of the merged nodes
+    for new in range(n, 2 * n - 1):
+        # Take the two smallest fronts; on a tie the leaf goes first, which keeps the longest code shorter
+        if leaf < n and (merged >= new or freq[leaf] <= freq[merged]):
+            first = leaf
+            leaf += 1
+        else:
+            first = merged
+            merged += 1
+        if leaf < n and (merged >= new or freq[leaf] <= freq[merged]):
+            second = leaf
+            leaf += 1
+        else:
+            second = merged
+            merged += 1
+        freq[new] = freq[first] + freq[second]
+        parent[first] = parent[second] = new
+    stats.count("merges", n - 1)
+    # Depths, from the root (last node, depth 0) down: every node's parent comes after it
+    parent[2 * n - 2] = 0
+    for node in range(2 * n - 3, -1, -1):
+        parent[node] = parent[parent[node]] + 1
+    lengths = [0] * n
+    for node, i in enumerate(order):
+        lengths[i] = parent[node]
+    return lengths
+
+# Function to find optimal code lengths no longer than max_length bits (package-merge). Level 0 is the
+#   sorted leaves; each higher level merges the leaves with "packages", the pairs of neighbouring items of
+#   the level below. The cheapest 2n - 2 items of the top level are chosen: every leaf in the chosen items
+#   adds 1 to that symbol's length, and every chosen package chooses 2 items of the level below, which are
+#   always its cheapest ones. So each level only keeps a flag per item (leaf or package), and going back
+#   down only needs the number of leaves and packages among the first k items. O(n * max_length) time.
+#   Returns the code lengths in the same order as symbols_freq
+def package_merge_code_lengths(symbols_freq, max_length, stats=NULL_STATS):
+    n = len(symbols_freq)
+    if n <= 1:
+        return [1] * n
+    if 1 << max_length < n:
+        raise ValueError(f"{n} symbols do not fit in codes of at most {max_length} bits")
+    max_length = min(max_length, n - 1)  # Huffman codes are never longer than n - 1 bits anyway
+    order = sorted(range(n), key=lambda i: symbols_freq[i][1])
+    leaves = [symbols_freq[i][1] for i in order]
+    weights = leaves
+    levels = []  # Per level above 0, the leaf/package flag of each item in cost order
+    packages = 0
+    for _ in range(max_length - 1):
+        paired = [weights[j] + weights[j + 1] for j in range(0, len(weights) - 1, 2)]
+        packages += len(paired)
+        merged, flags = [], bytearray()
+        i = j = 0
+        while i < n or j < len(paired):
+            if j == len(paired) or (i < n and leaves[i] <= paired[j]):  # On a tie the leaf goes first
+                merged.append(leaves[i])
+                flags.append(1)
+                i += 1
+            else:
+                merged.append(paired[j])
+                flags.append(0)
+                j += 1
+        weights = merged
+        levels.append(flags)
+    stats.count("packages", packages)
+    depth = [0] * n  # Code length of the i-th cheapest leaf
+    chosen = 2 * n - 2
+    for flags in reversed(levels):
+        leaf_count = flags.count(1, 0, chosen)
+        for i in range(leaf_count):
+            depth[i] += 1
+        chosen = 2 * (chosen - leaf_count)
+    for i in range(chosen):  # Level 0 is all leaves
+        depth[i] += 1
+    lengths = [0] * n
+    for rank, i in enumerate(order):
+        lengths[i] = depth[rank]
+    return lengths
+
+# Function to get the average code length in bits per symbol, from lengths in symbols_freq order
+def average_code_length(symbols_freq, lengths):
+    return sum(freq * length for (_, freq), length in zip(symbols_freq, lengths)) / sum(freq for _, freq in symbols_freq)
+
+def write_output_file(file_path, codes, symbols_freq, unlimited_avg=None):
     # Write the generated codes and average bits per symbol to the output file
     total_bits = 0  # To accumulate total bits used
     total_freq = sum(freq for _, freq in symbols_freq)  # Total frequency of all symbols
@@ -71,25 +243,275 @@ def write_output_file(file_path, codes, symbols_freq):
         
         avg_bits_per_symbol = total_bits / total_freq  # Calculate average bits per symbol
         file.write(f"Average number of bits used per symbol: {avg_bits_per_symbol:.3f}\n")
+        if unlimited_avg is not None:  # Codes were length limited: show what the limit costs
+            longest = max(len(codeword) for codeword in codes.values())
+            file.write(f"Average number of bits without the length limit: {unlimited_avg:.3f} "
+                       f"(longest codeword {longest} bits, {avg_bits_per_symbol - unlimited_avg:.5f} extra bits per symbol)\n")
 
 # Defintion for Huffman's algorithm, i.e. the main function
-def huffman_algo(input_file, output_file):
-    # Main function to execute Huffman's algorithm
-    symbols_freq = read_input_file(input_file)  # Read symbols and frequencies
-    huffman_tree_root = build_huffman_tree(symbols_freq)  # Build Huffman tree
-    huffman_codes = generate_huffman_codes(huffman_tree_root)  # Generate Huffman codes
-    write_output_file(output_file, huffman_codes, symbols_freq)  # Write output to file
-
-def process_all_files(input_dir, output_dir):
-    # Process all .txt files in the input directory and generate output files
-    for file_name in os.listdir(input_dir):
-        if file_name.endswith(".txt"):  # Check for .txt files
-            input_file = os.path.join(input_dir, file_name)  # Full path to input file
-            output_file = os.path.join(output_dir, file_name + "_output.txt")  # Output file path
-            huffman_algo(input_file, output_file)  # Execute Huffman's algorithm
+def huffman_algo(input_file, output_file, stats=NULL_STATS, method="tree", raw=False, max_length=None):
+    # Main function to execute Huffman's algorithm. Stats (see common/stats.py) get parse, solve and write times.
+    # method="two_queue" uses two_queue_code_lengths and canonical codes instead of the Node tree; same
+    # average bits per symbol, but codewords may differ where frequencies tie. Meant for huge alphabets.
+    # raw=True counts the bytes of any file instead (read_raw_file); the symbols are then byte values 0-255.
+    # max_length caps the codeword length (package_merge_code_lengths, canonical codes); the output then
+    # also gives the average bits of unlimited Huffman codes, to show what the cap costs
+    with stats.timer("parse"):
+        symbols_freq = read_raw_file(input_file) if raw else read_input_file(input_file)  # Read symbols and frequencies
+    with stats.timer("solve"):
+        unlimited_avg = None
+        if max_length is not None:
+            lengths = package_merge_code_lengths(symbols_freq, max_length, stats)
+            unlimited_avg = average_code_length(symbols_freq, two_queue_code_lengths(symbols_freq))
+            canonical = canonical_codes({symbol: length for (symbol, _), length in zip(symbols_freq, lengths)})
+            huffman_codes = {symbol: format(code, f"0{length}b") for symbol, (code, length) in canonical.items()}
+        elif method == "two_queue":
+            lengths = two_queue_code_lengths(symbols_freq, stats)
+            canonical = canonical_codes({symbol: length for (symbol, _), length in zip(symbols_freq, lengths)})
+            huffman_codes = {symbol: format(code, f"0{length}b") for symbol, (code, length) in canonical.items()}
+        else:
+            huffman_tree_root = build_huffman_tree(symbols_freq, stats)  # Build Huffman tree
+            huffman_codes = generate_huffman_codes(huffman_tree_root)  # Generate Huffman codes
+    with stats.timer("write"):
+        write_output_file(output_file, huffman_codes, symbols_freq, unlimited_avg)  # Write output to file
+
+# Function to assign canonical codes from code lengths ({symbol: length}). Symbols are sorted by
+#   (length, symbol) and numbered in that order, each code being the previous one plus 1, shifted left
+#   whenever the length grows. Only the lengths are needed to rebuild the codes, so that is all a
+#   compressed file has to store. Returns {symbol: (code as an int, length)}
+def canonical_codes(lengths):
+    codes = {}
+    code = 0
+    previous_length = 0
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous_length
+        codes[symbol] = (code, length)
+        code += 1
+        previous_length = length
+    return codes
+
+# Function to get code lengths from the codeword strings. A one-symbol alphabet gets a 1 bit code
+#   instead of the empty string
+def code_lengths(codes):
+    return {symbol: max(1, len(codeword)) for symbol, codeword in codes.items()}
+
+# Function to pack a sequence of symbols (bytes for a byte alphabet) into bits, first symbol in the
+#   highest bits. carry holds bits left over from an earlier call (a '0'/'1' string, fewer than 8);
+#   returns the whole bytes as a bytearray and the new carry. Every codeword is looked up as a '0'/'1'
+#   string and the joined string is turned into bytes with int(..., 2), so the per-symbol work stays in C
+def encode_chunk(data, code_strings, carry=""):
+    bits = carry + "".join(map(code_strings.__getitem__, data))
+    usable = len(bits) - len(bits) % 8
+    packed = bytearray(int(bits[:usable], 2).to_bytes(usable // 8, 'big')) if usable else bytearray()
+    return packed, bits[usable:]
+
+# Function to do the same as encode_chunk with NumPy, for a byte alphabet. bit_rows[v] holds the bits of
+#   v's code followed by padding, and bit_masks[v] is True for the real ones; gathering both for every
+#   byte and keeping the masked bits gives the whole bit stream at once, which packbits turns into bytes
+def encode_chunk_numpy(data, bit_rows, bit_masks, carry=""):
+    symbols = np.frombuffer(data, dtype=np.uint8)
+    bits = bit_rows[symbols][bit_masks[symbols]]
+    if carry:
+        bits = np.concatenate((np.frombuffer(carry.encode(), dtype=np.uint8) - ord("0"), bits))
+    usable = len(bits) - len(bits) % 8
+    rest = "".join("1" if bit else "0" for bit in bits[usable:])
+    return bytearray(np.packbits(bits[:usable]).tobytes()), rest
+
+# Function to make the bit_rows and bit_masks tables for encode_chunk_numpy from {byte: (code, length)}
+def bit_tables(codes):
+    width = max((length for _, length in codes.values()), default=1)
+    bit_rows = np.zeros((256, width), dtype=np.uint8)
+    bit_masks = np.zeros((256, width), dtype=bool)
+    for value, (code, length) in codes.items():
+        bit_rows[value, :length] = [int(bit) for bit in format(code, f"0{length}b")]
+        bit_masks[value, :length] = True
+    return bit_rows, bit_masks
+
+# Function to build the table the decoder reads table_bits bits at a time with. Entry i lists every
+#   symbol whose whole code fits in the table_bits-bit window i, in order, and how many bits they use,
+#   so one lookup usually decodes several symbols. An entry using 0 bits means the next code is longer
+#   than the window and has to be decoded bit by bit (decode_slow)
+def build_decode_table(codes, table_bits):
+    size = 1 << table_bits
+    # First pass: the one symbol each window starts with
+    first = [None] * size
+    for symbol, (code, length) in codes.items():
+        if length <= table_bits:
+            low = code << (table_bits - length)
+            for i in range(low, low + (1 << (table_bits - length))):
+                first[i] = (symbol, length)
+    byte_alphabet = all(isinstance(s, int) and 0 <= s < 256 for s in codes)
+    table = []
+    mask = size - 1
+    for i in range(size):
+        symbols = []
+        used = 0
+        while True:
+            entry = first[(i << used) & mask]
+            if entry is None or entry[1] > table_bits - used:
+                break
+            symbols.append(entry[0])
+            used += entry[1]
+        table.append((bytes(symbols) if byte_alphabet else tuple(symbols), used))
+    return table
+
+# Function to decode one symbol bit by bit from the canonical code (for codes longer than the table).
+#   acc holds nbits unread bits; returns the symbol and its length
+def decode_slow(acc, nbits, canonical):
+    first_code, first_index, counts, ordered = canonical
+    code = 0
+    for length in range(1, len(counts)):
+        code = (code << 1) | ((acc >> (nbits - length)) & 1)
+        if code - first_code[length] < counts[length]:
+            return ordered[first_index[length] + code - first_code[length]], length
+    raise ValueError("invalid Huffman code in input")
+
+# Function to get the tables for decode_slow: for every length, the first code, where its symbols
+#   start in the sorted symbol list, and how many codes have that length
+def canonical_tables(codes):
+    max_length = max(length for _, length in codes.values())
+    counts = [0] * (max_length + 1)
+    for _, length in codes.values():
+        counts[length] += 1
+    ordered = [symbol for symbol, _ in sorted(codes.items(), key=lambda item: (item[1][1], item[0]))]
+    first_code = [0] * (max_length + 1)
+    first_index = [0] * (max_length + 1)
+    code = index = 0
+    for length in range(1, max_length + 1):
+        code <<= 1
+        first_code[length] = code
+        first_index[length] = index
+        code += counts[length]
+        index += counts[length]
+    return first_code, first_index, counts, ordered
+
+# Function to decode packed bits starting at byte pos of payload (any bytes-like object, an mmap works
+#   too). Decoded symbols are handed to emit as lists of pieces (bytes for a byte alphabet, tuples
+#   otherwise). The zero bits padding the last byte can decode into a few symbols past the real end,
+#   so the caller cuts the output at the symbol count
+def decode(payload, codes, emit, pos=0, table_bits=DECODE_TABLE_BITS):
+    table = build_decode_table(codes, table_bits)
+    canonical = canonical_tables(codes)
+    max_length = len(canonical[2]) - 1
+    byte_alphabet = isinstance(table[0][0], bytes)
+    mask = (1 << table_bits) - 1
+    # After the last byte, pad bits of zeros are added so every real bit can be looked up; decoding
+    #   stops once only padding is left
+    pad = max(table_bits, max_length)
+    limit = table_bits
+    acc = nbits = 0
+    size = len(payload)
+    out = []
+    append = out.append
+    while True:
+        if pos < size:
+            piece = payload[pos:pos + REFILL_BYTES]
+            pos += len(piece)
+            acc = ((acc & ((1 << nbits) - 1)) << (8 * len(piece))) | int.from_bytes(piece, 'big')
+            nbits += 8 * len(piece)
+        elif limit == table_bits:
+            acc <<= pad
+            nbits += pad
+            limit = pad + 1
+        else:
+            break
+        while nbits >= limit:
+            symbols, used = table[(acc >> (nbits - table_bits)) & mask]
+            if not used:
+                # Code longer than the table, decode it bit by bit once all of it is in acc
+                if nbits < max_length and pos < size:
+                    break
+                if nbits < max_length:
+                    acc <<= max_length
+                    nbits += max_length
+                symbol, used = decode_slow(acc & ((1 << nbits) - 1), nbits, canonical)
+                symbols = bytes((symbol,)) if byte_alphabet else (symbol,)
+            nbits -= used
+            append(symbols)
+        if len(out) >= 4096:
+            emit(out)
+            out = []
+            append = out.append
+    emit(out)
+
+# Function to compress a file of raw bytes: one pass to count byte frequencies, then the canonical codes
+#   are built and the file is encoded chunk by chunk. The output is COMPRESSED_MAGIC, the number of bytes
+#   (8 bytes, little-endian), the 256 code lengths (1 byte each, 0 = byte never used) and the packed bits.
+#   max_length limits the code lengths (package-merge)
+def compress_file(input_file, output_file, max_length=None):
+    symbols_freq = read_raw_file(input_file)
+    count = sum(freq for _, freq in symbols_freq)
+    if max_length is not None:  # e.g. DECODE_TABLE_BITS, so every code is decoded by one table lookup
+        lengths = package_merge_code_lengths(symbols_freq, max_length)
+    else:
+        lengths = two_queue_code_lengths(symbols_freq)
+    lengths = dict(zip((value for value, _ in symbols_freq), lengths))
+    codes = canonical_codes(lengths)
+    with open(input_file, 'rb') as f, open(output_file, 'wb') as out:
+        out.write(COMPRESSED_MAGIC + count.to_bytes(8, 'little'))
+        out.write(bytes(lengths.get(value, 0) for value in range(256)))
+        carry = ""
+        if np is not None:
+            bit_rows, bit_masks = bit_tables(codes)
+        else:
+            code_strings = [format(codes[v][0], f"0{codes[v][1]}b") if v in codes else "" for v in range(256)]
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            if np is not None:
+                packed, carry = encode_chunk_numpy(chunk, bit_rows, bit_masks, carry)
+            else:
+                packed, carry = encode_chunk(chunk, code_strings, carry)
+            out.write(memoryview(packed))
+        if carry:
+            out.write(int(carry.ljust(8, "0"), 2).to_bytes(1, 'big'))  # Pad the last byte with zero bits
+
+# Function to undo compress_file
+def decompress_file(input_file, output_file):
+    with open(input_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data, open(output_file, 'wb') as out:
+            header = len(COMPRESSED_MAGIC) + 8 + 256
+            if data[:len(COMPRESSED_MAGIC)] != COMPRESSED_MAGIC:
+                raise ValueError(f"{input_file}: not a compressed file")
+            count = int.from_bytes(data[len(COMPRESSED_MAGIC):len(COMPRESSED_MAGIC) + 8], 'little')
+            lengths = {value: length for value, length in enumerate(data[header - 256:header]) if length}
+            if not count:
+                return
+            codes = canonical_codes(lengths)
+            written = 0
+
+            def emit(pieces):
+                nonlocal written
+                block = b"".join(pieces)[:count - written]  # The zero padding may decode into a few extra bytes
+                out.write(block)
+                written += len(block)
+
+            decode(data, codes, emit, pos=header)
+
+def process_all_files(input_dir, output_dir, stats_file=None, method="tree", max_length=None, processes=None, force=False):
+    # Process all .txt files in the input directory and generate output files (sample.txt -> sample.txt_output.txt).
+    # Runs through common/batch.py: files in parallel (processes), skipping those whose output is up to
+    # date unless force=True. With stats_file set, one JSON line of stats per file that ran is appended to it
+    process = partial(huffman_algo, method=method, max_length=max_length)
+    run_batch(input_dir, output_dir, process, "huffman", source_version(__file__, options=f"{method} {max_length}"),
+              stats_file, processes, force, output_name=lambda file_name: file_name + "_output.txt")
 
 # Entry point for the program
 if __name__ == "__main__":
-    input_dir = "Inputs"  # Directory containing input files
-    output_dir = "Outputs"  # Directory for output files
-    process_all_files(input_dir, output_dir)  # Process all input files
+    parser = argparse.ArgumentParser(description="Huffman codes for every symbol table in Inputs, or compress/decompress a file.")
+    parser.add_argument("--compress", nargs=2, metavar=("INPUT", "OUTPUT"), help="compress a file of raw bytes")
+    parser.add_argument("--decompress", nargs=2, metavar=("INPUT", "OUTPUT"), help="undo --compress")
+    parser.add_argument("--raw", nargs=2, metavar=("INPUT", "OUTPUT"), help="write the code table for the bytes of any file")
+    parser.add_argument("--method", choices=("tree", "two_queue"), default="tree", help="how the code tables are built (two_queue for huge alphabets)")
+    parser.add_argument("--max-length", type=int, metavar="L", help="limit codewords to L bits (package-merge)")
+    parser.add_argument("--processes", type=int, help="worker processes for the input files (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="redo every input, even those whose output is up to date")
+    args = parser.parse_args()
+    if args.compress:
+        compress_file(*args.compress, max_length=args.max_length)
+    elif args.decompress:
+        decompress_file(*args.decompress)
+    elif args.raw:
+        huffman_algo(*args.raw, method=args.method, raw=True, max_length=args.max_length)
+    else:
+        input_dir = "Inputs"  # Directory containing input files
+        output_dir = "Outputs"  # Directory for output files
+        process_all_files(input_dir, output_dir, stats_file_from_env(), args.method, args.max_length, args.processes, args.force)  # Process all input files (APM5663_STATS=file turns on stats)
@@ -1,83 +1,569 @@
+import argparse
 import os
+import sys
+from array import array
 from collections import defaultdict, deque
+from functools import partial
 
-# Function to read the graph from a file
+# The shared edge-list parser lives in common/ at the top of the repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.batch import run_batch, source_version
+from common.edgelist import as_columns, to_array
+from common.graphfile import load_graph
+from common.stats import NULL_STATS, stats_file_from_env
+
+# NumPy is optional, it only makes building the residual graph faster
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Function to read the graph from a file. The edges come back as typed (u, v, capacity) columns
+#   (see common/edgelist.py); iterating them still gives one tuple per edge. The parsed graph is cached
+#   in a binary file next to the input, so later runs skip the parsing (see common/graphfile.py)
 def read_graph(file_path):
-    with open(file_path, 'r') as file:
-        num_vertices = int(file.readline().strip())  # First line: number of vertices
-        source, sink = map(int, file.readline().strip().split())  # Second line: source and sink vertices
-        edges = [tuple(map(int, line.strip().split())) for line in file]  # Remaining lines: edges
+    graph_file = load_graph(file_path, header_lines=2, num_columns=3)
+    header, edges = graph_file.header, graph_file.edges
+    num_vertices = header[0][0]  # First line: number of vertices
+    source, sink = header[1]  # Second line: source and sink vertices
     return num_vertices, source, sink, edges
 
-# Function to perform BFS and find an augmenting path
-def bfs(capacity, source, sink, parent):
-    visited = set() # Set to store visited vertices
+# Residual graph stored in flat int arrays. Every pair of vertices {u, v} joined by an input edge gets two
+#   arcs, 2k (u->v) and 2k + 1 (v->u), so the twin of arc a is always a ^ 1. For arc a:
+#     to[a]       vertex the arc points to (the arc starts at to[a ^ 1])
+#     cap[a]      residual capacity
+#     orig[a]     original capacity (0 for a pure reverse arc)
+#     next_arc[a] next arc out of the same vertex, -1 at the end of the list
+#   head[u] is the first arc out of u and tail[u] the last. Like the old dicts, parallel edges keep the
+#   last capacity given and an edge in the other direction shares the pair. The flow on an arc is never
+#   stored, it is orig[a] - cap[a]
+class ResidualGraph:
+    def __init__(self, num_vertices, edges, link_reverse=True):
+        u_col, v_col, w_col = as_columns(edges, 3)
+        n = max(num_vertices, max(u_col, default=0), max(v_col, default=0))
+        self.num_vertices = n
+        self.head = array('q', [-1]) * (n + 1)
+        self.tail = array('q', [-1]) * (n + 1)
+        self.degree = array('q', [0]) * (n + 1)  # Number of arcs in each vertex's list
+        if np is not None and len(u_col):
+            self._build_numpy(n, u_col, v_col, w_col)
+        else:
+            self._build(n, u_col, v_col, w_col)
+        self.linked = bytearray(len(self.to))  # 1 once the arc is in the list of the vertex it starts at
+        self.used = bytearray(len(self.to))  # 1 once the arc has carried flow
+        self.used_order = array('q')  # Those arcs in the order they were first used, for the output order
+        for a in self.input_arcs:
+            self.link(a)
+        if link_reverse:
+            for a in range(len(self.to)):
+                if not self.linked[a]:
+                    self.link(a)
+
+    # Function to make the arcs. The pair of {u, v} is found by the key min * (n + 1) + max, and the arc
+    #   of u->v is 2 * pair + (u > v). Sets to, cap, orig, next_arc, is_input and input_arcs
+    def _build(self, n, u_col, v_col, w_col):
+        self.to = array('q')
+        self.is_input = bytearray()  # 1 if the arc's direction appears in the input
+        self.input_arcs = array('q')  # Input arcs in the order they first appear, for the output order
+        pair_of = {}
+        cap = {}
+        for u, v, w in zip(u_col, v_col, w_col):
+            if u == v:
+                continue  # A self-loop never carries flow or crosses a cut
+            lo, hi = (u, v) if u < v else (v, u)
+            pair = pair_of.get(lo * (n + 1) + hi)
+            if pair is None:
+                pair = pair_of[lo * (n + 1) + hi] = len(self.to) // 2
+                self.to.extend((hi, lo))
+                self.is_input.extend(b"\0\0")
+            a = 2 * pair + (u > v)
+            cap[a] = w  # Same as capacity[u][v] = w: the last capacity wins, the position is the first one
+            if not self.is_input[a]:
+                self.is_input[a] = 1
+                self.input_arcs.append(a)
+        self.cap = array('q', bytes(8 * len(self.to)))
+        for a, w in cap.items():
+            self.cap[a] = w
+        self.orig = array('q', self.cap)
+        self.next_arc = array('q', [-1]) * len(self.to)
+
+    # Function to make the same arcs as _build with NumPy
+    def _build_numpy(self, n, u_col, v_col, w_col):
+        us = np.frombuffer(u_col, dtype=np.int64)
+        vs = np.frombuffer(v_col, dtype=np.int64)
+        ws = np.frombuffer(w_col, dtype=np.int64)
+        keep = us != vs
+        us, vs, ws = us[keep], vs[keep], ws[keep]
+        lo, hi = np.minimum(us, vs), np.maximum(us, vs)
+        _, first, pair = np.unique(lo * (n + 1) + hi, return_index=True, return_inverse=True)
+        arcs = 2 * pair.reshape(-1) + (us > vs)
+        to = np.empty(2 * len(first), dtype=np.int64)
+        to[0::2], to[1::2] = hi[first], lo[first]
+        self.to = to_array(to)
+        # First time each arc appears gives the list order, the last time gives its capacity
+        used, first = np.unique(arcs, return_index=True)
+        _, last = np.unique(arcs[::-1], return_index=True)
+        cap = np.zeros(len(to), dtype=np.int64)
+        cap[used] = ws[::-1][last]
+        self.cap = to_array(cap)
+        self.orig = to_array(cap)
+        is_input = np.zeros(len(to), dtype=np.uint8)
+        is_input[used] = 1
+        self.is_input = bytearray(is_input.tobytes())
+        self.input_arcs = to_array(used[np.argsort(first, kind='stable')])
+        self.next_arc = array('q', [-1]) * len(to)
+
+    # Function to append arc a to the end of the list of the vertex it starts at
+    def link(self, a):
+        u = self.to[a ^ 1]
+        self.linked[a] = 1
+        if self.head[u] == -1:
+            self.head[u] = a
+        else:
+            self.next_arc[self.tail[u]] = a
+        self.tail[u] = a
+        self.degree[u] += 1
+
+    # Function to add the pair of arcs u->v and v->u (both with capacity 0) and return the arc u->v
+    def add_pair(self, u, v):
+        if max(u, v) > self.num_vertices:
+            grow = max(u, v) - self.num_vertices
+            self.head.extend([-1] * grow)
+            self.tail.extend([-1] * grow)
+            self.degree.extend([0] * grow)
+            self.num_vertices = max(u, v)
+        a = len(self.to)
+        self.to.extend((v, u))
+        self.cap.extend((0, 0))
+        self.orig.extend((0, 0))
+        self.next_arc.extend((-1, -1))
+        self.linked.extend(b"\0\0")
+        self.used.extend(b"\0\0")
+        self.is_input.extend(b"\0\0")
+        self.link(a)
+        self.link(a ^ 1)
+        return a
+
+    # Function to list the vertices that have at least one arc
+    def vertices(self):
+        return [u for u in range(self.num_vertices + 1) if self.head[u] != -1]
+
+# Function to perform BFS and find an augmenting path. parent[v] is set to the arc used to reach v.
+#   Stats: BFS runs and arcs scanned
+def bfs(residual, source, sink, parent, stats=NULL_STATS):
+    head, next_arc, to, cap = residual.head, residual.next_arc, residual.to, residual.cap
+    visited = bytearray(residual.num_vertices + 1) # Visited flag per vertex
     queue = deque([source]) # Queue for BFS
-    visited.add(source) # Mark source as visited
+    visited[source] = 1 # Mark source as visited
+    degree = residual.degree
+    scanned = 0  # Whole arc lists of the vertices dequeued, less what's left unscanned on an early return
+    stats.count("bfs_runs")
     
     while queue: # While queue is not empty
         u = queue.popleft() # Pop the front vertex, using the popleft() function
-        # Iterate over all adjacent vertices
-        for v in capacity[u]:
-            if v not in visited and capacity[u][v] > 0:  # If not visited and capacity > 0
+        scanned += degree[u]
+        # Iterate over all arcs out of u
+        a = head[u]
+        while a != -1:
+            v = to[a]
+            if not visited[v] and cap[a] > 0:  # If not visited and capacity > 0
                 queue.append(v)
-                visited.add(v)
-                parent[v] = u
+                visited[v] = 1
+                parent[v] = a
                 # If sink is reached, return True, i.e. we have a f-augmenting s-t path
                 if v == sink:
+                    if stats.enabled:
+                        a = next_arc[a]
+                        while a != -1:
+                            scanned -= 1
+                            a = next_arc[a]
+                        stats.count("arcs_scanned", scanned)
                     return True
+            a = next_arc[a]
     # No path was found
+    stats.count("arcs_scanned", scanned)
     return False
 
-# Function to implement the Ford-Fulkerson algorithm. Num_vertices not used, to lazy to fix right now....
-def ford_fulkerson(num_vertices, source, sink, edges):
-    capacity = defaultdict(lambda: defaultdict(int))
+# Function to find the minimum cut once no augmenting path is left: the vertices reachable from the
+#   source in the residual graph, and the original edges leaving them
+def find_min_cut(residual, source):
+    head, next_arc, to, cap = residual.head, residual.next_arc, residual.to, residual.cap
+    visited = set()
+    queue = deque([source])
+    visited.add(source)
+
+    # Perform BFS to find all vertices reachable from the source. I think there is a better way to do this
+    while queue:
+        u = queue.popleft()
+        a = head[u]
+        while a != -1:
+            v = to[a]
+            if v not in visited and cap[a] > 0:
+                queue.append(v)
+                visited.add(v)
+            a = next_arc[a]
+
+    min_cut = []
+    for u in visited:
+        a = head[u]
+        while a != -1:
+            if residual.is_input[a] and to[a] not in visited and residual.orig[a] > 0:
+                min_cut.append((u, to[a], residual.orig[a]))
+            a = next_arc[a]
+    return min_cut, visited
+
+# Function to read the flow on every edge back out of the residual capacities (flow = original - residual).
+#   The arcs are listed in the given order, by default every input arc in the order it was read
+def flow_from_residual(residual, arcs=None):
+    to, orig, cap = residual.to, residual.orig, residual.cap
     flow = defaultdict(lambda: defaultdict(int))
-    original_capacity = defaultdict(lambda: defaultdict(int))
-    for u, v, w in edges:
-        # This capacity dictionary stores the residual capacity of the graph
-        capacity[u][v] = w
-        original_capacity[u][v] = w # Store the original capacity, for output as it is what truly "certifies" the cut
-    
-    parent = {}
-    max_flow = 0
+    for a in residual.input_arcs if arcs is None else arcs:
+        flow[to[a ^ 1]][to[a]] = orig[a] - cap[a]
+    return flow
+
+# Function to push flow from source to sink along shortest augmenting paths (Edmonds-Karp) until no
+#   path is left or limit units have been pushed. Returns the amount pushed.
+#   A reverse arc only joins its vertex's list once flow is first pushed on its twin, which is when the
+#   old dict version created capacity[v][u], so paths, flows and the cut come out exactly as before
+def augment(residual, source, sink, limit=float('Inf'), stats=NULL_STATS):
+    to, cap, linked, used = residual.to, residual.cap, residual.linked, residual.used
+    parent = array('q', [-1]) * (residual.num_vertices + 1)
+    pushed = 0
     
     # While there is an augmenting path
-    while bfs(capacity, source, sink, parent):
-        path_flow = float('Inf')
+    while pushed < limit and bfs(residual, source, sink, parent, stats):
+        stats.count("augmenting_paths")
+        path_flow = limit - pushed
         s = sink
         # Find the minimum flow in the path
         while s != source:
-            path_flow = min(path_flow, capacity[parent[s]][s])
-            s = parent[s]
+            a = parent[s]
+            path_flow = min(path_flow, cap[a])
+            s = to[a ^ 1]
         # Add path flows to the residual graph
         v = sink
         while v != source:
-            u = parent[v]
-            capacity[u][v] -= path_flow
-            capacity[v][u] += path_flow
-            flow[u][v] += path_flow
-            flow[v][u] -= path_flow
-            v = parent[v]
-        # Add path flow to the max flow
-        max_flow += path_flow
+            a = parent[v]
+            cap[a] -= path_flow
+            cap[a ^ 1] += path_flow
+            if not linked[a ^ 1]:
+                residual.link(a ^ 1)
+            for x in (a, a ^ 1):
+                if not used[x]:
+                    used[x] = 1
+                    residual.used_order.append(x)
+            v = to[a ^ 1]
+        pushed += path_flow
+    return pushed
+
+# Function to implement the Ford-Fulkerson algorithm (Edmonds-Karp, BFS augmenting paths). Num_vertices not used, to lazy to fix right now....
+def ford_fulkerson(num_vertices, source, sink, edges, stats=NULL_STATS):
+    with stats.timer("build"):
+        residual = ResidualGraph(max(num_vertices, source, sink), edges, link_reverse=False)
+    with stats.timer("augment"):
+        max_flow = augment(residual, source, sink, stats=stats)
     
     # Find the minimum cut
-    visited = set()
-    queue = deque([source])
-    visited.add(source)
+    with stats.timer("min_cut"):
+        min_cut, visited = find_min_cut(residual, source)
     
-    # Perform BFS to find all vertices reachable from the source. I think there is a better way to do this
-    while queue:
-        u = queue.popleft()
-        for v in capacity[u]:
-            if v not in visited and capacity[u][v] > 0:
-                queue.append(v)
-                visited.add(v)
-    
-    min_cut = [(u, v, original_capacity[u][v]) for u in visited for v in original_capacity[u] if v not in visited and original_capacity[u][v] > 0]
-    
-    return max_flow, flow, min_cut, visited
+    return max_flow, flow_from_residual(residual, residual.used_order), min_cut, visited
+
+# Function to implement Dinic's algorithm. Each round does one BFS to build the level graph (levels =
+#   BFS distance from the source), then pushes a blocking flow through it: a DFS that only steps from
+#   level i to level i + 1, where every vertex remembers which arc it got up to (its "current arc"),
+#   so no arc is looked at twice in a round. Returns the same tuple as ford_fulkerson
+#   Stats: rounds, arcs scanned by the level BFS, augmenting paths
+def dinic(num_vertices, source, sink, edges, stats=NULL_STATS):
+    residual = ResidualGraph(max(num_vertices, source, sink), edges)
+    head, next_arc, to, cap = residual.head, residual.next_arc, residual.to, residual.cap
+    size = residual.num_vertices + 1
+    max_flow = 0
+    if source == sink:
+        # Nothing to push (and the first path found would be empty), same answer as the other engines
+        min_cut, visited = find_min_cut(residual, source)
+        return max_flow, flow_from_residual(residual), min_cut, visited
+
+    rounds = scanned = paths = 0
+
+    while True:
+        # BFS for the level graph
+        rounds += 1
+        level = array('q', [-1]) * size
+        level[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            scanned += residual.degree[u]
+            a = head[u]
+            while a != -1:
+                v = to[a]
+                if level[v] < 0 and cap[a] > 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+                a = next_arc[a]
+        if level[sink] < 0:
+            break
+
+        # Blocking flow: grow a path (a stack of arcs) from the source one admissible arc at a time
+        current_arc = array('q', head)
+        path = []
+        u = source
+        while True:
+            if u == sink:
+                # Push the bottleneck along the path, then back up to just before the first saturated arc
+                path_flow = min(cap[a] for a in path)
+                retreat_to = None
+                for i, a in enumerate(path):
+                    cap[a] -= path_flow
+                    cap[a ^ 1] += path_flow
+                    if retreat_to is None and cap[a] == 0:
+                        retreat_to = i
+                max_flow += path_flow
+                paths += 1
+                del path[retreat_to:]
+                u = to[path[-1]] if path else source
+                continue
+            a = current_arc[u]
+            while a != -1 and not (cap[a] > 0 and level[to[a]] == level[u] + 1):
+                a = next_arc[a]
+            current_arc[u] = a
+            if a != -1:
+                path.append(a)
+                u = to[a]
+            else:
+                # Dead end, take u out of the level graph for the rest of the round
+                level[u] = -1
+                if not path:
+                    break
+                a = path.pop()
+                u = to[a ^ 1]
+                current_arc[u] = next_arc[a]
+    stats.count("rounds", rounds)
+    stats.count("arcs_scanned", scanned)
+    stats.count("augmenting_paths", paths)
+
+    min_cut, visited = find_min_cut(residual, source)
+    return max_flow, flow_from_residual(residual), min_cut, visited
+
+# Function to implement highest-label push-relabel. Every vertex has a height; excess flow is pushed
+#   "downhill" along residual arcs from a vertex to a neighbor one step lower, and a vertex that is stuck
+#   with excess is lifted (relabeled). The active vertex with the greatest height is always handled
+#   first. Two heuristics keep the number of relabels down:
+#     - global relabel: every so often, heights are reset to exact BFS distances to the sink
+#       (or n + distance to the source for vertices that can no longer reach the sink)
+#     - gap: if no vertex is left at some height below n, nothing above it can reach the sink any more,
+#       so those vertices are lifted to n + 1 at once and start sending their excess back to the source
+#   Excess that can't reach the sink goes back to the source, so the result is a proper flow.
+#   Returns the same tuple as ford_fulkerson. Stats: pushes, relabels, global relabels and gaps
+def push_relabel(num_vertices, source, sink, edges, stats=NULL_STATS):
+    residual = ResidualGraph(max(num_vertices, source, sink), edges)
+    head, next_arc, to, cap = residual.head, residual.next_arc, residual.to, residual.cap
+    size = residual.num_vertices + 1
+    vertices = sorted(set(residual.vertices()) | {source, sink})
+    n = len(vertices)
+    height = array('q', [0]) * size
+    excess = array('q', [0]) * size
+    current_arc = array('q', head)
+
+    # Saturate every arc out of the source
+    a = head[source]
+    while a != -1:
+        c = cap[a]
+        if c > 0:
+            cap[a] = 0
+            cap[a ^ 1] += c
+            excess[to[a]] += c
+            excess[source] -= c
+        a = next_arc[a]
+
+    # BFS backwards over residual arcs from root, labeling with base + distance (-1 = no label yet)
+    def label_from(root, base):
+        height[root] = base
+        queue = deque([root])
+        while queue:
+            x = queue.popleft()
+            a = head[x]
+            while a != -1:
+                u = to[a]
+                if height[u] < 0 and cap[a ^ 1] > 0:
+                    height[u] = height[x] + 1
+                    queue.append(u)
+                a = next_arc[a]
+
+    # active[h]: vertices at height h with excess; count[h]: all vertices at height h
+    active = [[] for _ in range(2 * n + 1)]
+    count = [0] * (2 * n + 1)
+
+    def global_relabel():
+        for v in vertices:
+            height[v] = -1
+        height[source] = n  # Keeps the sink search from going through the source
+        label_from(sink, 0)
+        label_from(source, n)
+        for h in range(2 * n + 1):
+            active[h].clear()
+            count[h] = 0
+        for v in vertices:
+            if height[v] < 0:
+                height[v] = 2 * n  # Can't reach the sink or the source, so it has no excess either
+            current_arc[v] = head[v]
+            count[height[v]] += 1
+            if excess[v] > 0 and v != sink and v != source and height[v] < 2 * n:
+                active[height[v]].append(v)
+
+    global_relabel()
+    highest = 2 * n - 1
+    relabels_since_global = 0
+    pushes = relabels = global_relabels = gaps = 0
+
+    while True:
+        while highest >= 0 and not active[highest]:
+            highest -= 1
+        if highest < 0:
+            break
+        u = active[highest].pop()
+        if height[u] != highest or excess[u] == 0:
+            continue  # Moved by a gap or global relabel since it was queued
+
+        # Discharge u: push until its excess is gone, relabeling when it runs out of arcs
+        while excess[u] > 0:
+            a = current_arc[u]
+            if a == -1:
+                old_height = height[u]
+                new_height = 2 * n - 2
+                b = head[u]
+                while b != -1:
+                    if cap[b] > 0 and height[to[b]] < new_height:
+                        new_height = height[to[b]]
+                    b = next_arc[b]
+                new_height += 1
+                count[old_height] -= 1
+                height[u] = new_height
+                count[new_height] += 1
+                current_arc[u] = head[u]
+                relabels_since_global += 1
+                relabels += 1
+                if count[old_height] == 0 and old_height < n:
+                    gaps += 1
+                    # Gap: everything strictly between old_height and n is cut off from the sink
+                    for v in vertices:
+                        if old_height < height[v] < n:
+                            count[height[v]] -= 1
+                            height[v] = n + 1
+                            count[n + 1] += 1
+                            current_arc[v] = head[v]
+                            if excess[v] > 0 and v != u:
+                                active[n + 1].append(v)
+                    highest = max(highest, n + 1)
+                continue
+            v = to[a]
+            c = cap[a]
+            if c > 0 and height[u] == height[v] + 1:
+                delta = min(excess[u], c)
+                cap[a] -= delta
+                cap[a ^ 1] += delta
+                excess[u] -= delta
+                pushes += 1
+                if excess[v] == 0 and v != sink and v != source:
+                    active[height[v]].append(v)
+                excess[v] += delta
+            else:
+                current_arc[u] = next_arc[a]
+
+        highest = max(highest, height[u])
+        if relabels_since_global >= n:
+            global_relabel()
+            global_relabels += 1
+            relabels_since_global = 0
+            highest = 2 * n - 1
+
+    stats.count("pushes", pushes)
+    stats.count("relabels", relabels)
+    stats.count("global_relabels", global_relabels)
+    stats.count("gaps", gaps)
+
+    max_flow = excess[sink]
+    min_cut, visited = find_min_cut(residual, source)
+    return max_flow, flow_from_residual(residual), min_cut, visited
+
+# Max flow that is kept up to date while edge capacities change. The residual graph of the last solve
+#   is kept, so after a batch of changes only the difference has to be pushed:
+#     - an increase just adds residual capacity, and augmenting from the current flow picks it up
+#     - a decrease below the flow on u->v leaves u with too much flow coming in and v with too little.
+#       That excess is first rerouted from u to v around the edge, whatever is left is sent back from
+#       u to the source and from the sink to v, and then the flow is augmented again
+#   Only the paths that change are searched, not the whole network.
+#   Usage: solver = IncrementalMaxFlow(num_vertices, source, sink, edges); solver.solve();
+#   solver.update_capacities([(u, v, new_capacity), ...]). Both return the same tuple as ford_fulkerson
+class IncrementalMaxFlow:
+    def __init__(self, num_vertices, source, sink, edges):
+        self.source = source
+        self.sink = sink
+        self.residual = ResidualGraph(max(num_vertices, source, sink), edges)
+        self.arc_of = None  # (u, v) -> arc, built the first time capacities change
+
+    # Function to (re)augment from the current flow and return max flow, flow, min cut and visited set
+    def solve(self):
+        residual, source = self.residual, self.source
+        augment(residual, source, self.sink)
+        # The flow value is whatever leaves the source, however it got there
+        max_flow = 0
+        a = residual.head[source]
+        while a != -1:
+            max_flow += residual.orig[a] - residual.cap[a]
+            a = residual.next_arc[a]
+        min_cut, visited = find_min_cut(residual, source)
+        return max_flow, flow_from_residual(residual), min_cut, visited
+
+    # Function to set new capacities for a batch of (u, v, capacity) edges and solve again. An edge
+    #   that wasn't in the network before is added
+    def update_capacities(self, changes):
+        residual = self.residual
+        if self.arc_of is None:
+            self.arc_of = {(residual.to[a ^ 1], residual.to[a]): a for a in range(len(residual.to))}
+        cap, orig = residual.cap, residual.orig
+        for u, v, capacity in changes:
+            if u == v:
+                continue  # A self-loop never carries flow
+            a = self.arc_of.get((u, v))
+            if a is None:
+                a = residual.add_pair(u, v)
+                self.arc_of[(u, v)] = a
+                self.arc_of[(v, u)] = a ^ 1
+            if not residual.is_input[a]:
+                residual.is_input[a] = 1
+                residual.input_arcs.append(a)
+            delta = capacity - orig[a]
+            orig[a] = capacity
+            cap[a] += delta
+            if cap[a] < 0:
+                # More flow on u->v than the new capacity: take the extra off the edge and repair around it
+                excess = -cap[a]
+                cap[a] = 0
+                cap[a ^ 1] -= excess
+                self._remove_excess(u, v, excess)
+        return self.solve()
+
+    # Function to repair the flow after excess units were taken off the edge u->v (u now has excess
+    #   more coming in than going out, v excess more going out than coming in)
+    def _remove_excess(self, u, v, excess):
+        residual, source, sink = self.residual, self.source, self.sink
+        excess -= augment(residual, u, v, excess)  # Reroute around the edge
+        if excess > 0:
+            # Whatever can't be rerouted has to be taken off a source -> u -> v -> sink path
+            if u != source:
+                augment(residual, u, source, excess)
+            if v != sink:
+                augment(residual, sink, v, excess)
+
+# Max-flow engines selectable from the command line (--engine)
+ENGINES = {
+    "edmonds_karp": ford_fulkerson,
+    "dinic": dinic,
+    "push_relabel": push_relabel,
+}
+DEFAULT_ENGINE = "edmonds_karp"  # Keeps the outputs identical to earlier runs; dinic is the faster choice
 
 # Function to write the output to a file
 def write_output(file_path, max_flow, flow, min_cut, visited, source):
@@ -96,24 +582,31 @@ def write_output(file_path, max_flow, flow, min_cut, visited, source):
         for u, v, w in min_cut:
             file.write(f"Edge {u}-{v}, Cap: {w}\n")
 
-# Main function to process a single file
-def process_file(input_filepath, output_filepath):
-    num_vertices, source, sink, edges = read_graph(input_filepath)
-    max_flow, flow, min_cut, visited = ford_fulkerson(num_vertices, source, sink, edges)
-    write_output(output_filepath, max_flow, flow, min_cut, visited, source)
-
-# Function to process all files in the input directory
-def process_all_files(input_dir, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".txt"):  # Assuming input files have .txt extension
-            input_filepath = os.path.join(input_dir, filename)
-            output_filepath = os.path.join(output_dir, filename.replace(".txt", "_output.txt"))
-            process_file(input_filepath, output_filepath)
+# Main function to process a single file. Stats (see common/stats.py) get parse, solve and write times
+#   plus the engine's counters
+def process_file(input_filepath, output_filepath, engine=DEFAULT_ENGINE, stats=NULL_STATS):
+    with stats.timer("parse"):
+        num_vertices, source, sink, edges = read_graph(input_filepath)
+    with stats.timer("solve"):
+        max_flow, flow, min_cut, visited = ENGINES[engine](num_vertices, source, sink, edges, stats)
+    with stats.timer("write"):
+        write_output(output_filepath, max_flow, flow, min_cut, visited, source)
+
+# Function to process all files in the input directory.
+#   Runs through common/batch.py: files in parallel (processes), skipping those whose output is up to
+#   date unless force=True. With stats_file set, one JSON line of stats per file that ran is appended to it
+def process_all_files(input_dir, output_dir, engine=DEFAULT_ENGINE, stats_file=None, processes=None, force=False):
+    run_batch(input_dir, output_dir, partial(process_file, engine=engine), "max_flow." + engine,
+              source_version(__file__, options=engine), stats_file, processes, force)
 
 # Entry point for the program
 if __name__ == "__main__":
-    input_dir = "Inputs"  # Directory containing input files
-    output_dir = "Outputs"  # Directory for output files
-    process_all_files(input_dir, output_dir)  # Process all input files
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Maximum flow and minimum cut for every input file.")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=DEFAULT_ENGINE, help="max-flow algorithm to use")
+    parser.add_argument("--input-dir", default="Inputs", help="directory containing input files")
+    parser.add_argument("--output-dir", default="Outputs", help="directory for output files")
+    parser.add_argument("--stats", default=stats_file_from_env(), help="append per-file stats as JSON lines to this file (default: $APM5663_STATS)")
+    parser.add_argument("--processes", type=int, help="worker processes for the input files (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="redo every input, even those whose output is up to date")
+    args = parser.parse_args()
+    process_all_files(args.input_dir, args.output_dir, args.engine, args.stats, args.processes, args.force)  # Process all input files
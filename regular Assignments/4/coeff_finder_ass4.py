@@ -1,26 +1,291 @@
+import argparse
+import math
 import os
+import sys
+from fractions import Fraction
+from functools import partial
 
-# Function to read the power series from a file
-def read_power_series(file_path):
+# The shared stats helpers live in common/ at the top of the repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.batch import run_batch, source_version
+from common.stats import NULL_STATS, stats_file_from_env
+
+try:
+    import numpy as np  # Optional: FFT multiplication of long series
+except ImportError:
+    np = None
+
+FFT_MIN_LENGTH = 64  # Series products where both factors are at least this long use the FFT (with NumPy)
+FFT_MAX_ERROR = 1e-11  # FFT coefficients whose rounding error may be above this fraction of their size are worked out again
+FFT_MAX_ATTEMPTS = 4  # FFTs with different scalings tried per product before the rest is summed directly
+NTT_MIN_LENGTH = 32  # Same for the NTT products of exact mode
+NTT_ROOT_BITS = 18  # Exact mode primes are c * 2^18 + 1 below 2^31 (about 800), so products fit in int64 and NTTs go up to 2^18
+MILLER_MAX_ERROR = 1e-10  # Miller's recurrence gives up once an error bound is above this fraction of max(size, 1)
+
+# Function to read the power series from a file. exact=True reads the coefficients as Fractions (the
+#   decimals in the file are exact, e.g. 0.41666666E-1 = 20833333/500000000)
+def read_power_series(file_path, exact=False):
     with open(file_path, 'r') as file:
         n, k, m = map(int, file.readline().strip().split())
-        coefficients = [float(file.readline().strip()) for _ in range(n + 1)]
+        coefficients = [(Fraction if exact else float)(file.readline().strip()) for _ in range(n + 1)]
     return n, k, m, coefficients
 
-def multiply_series(a, b, m):
+# Function to multiply two series, truncated after x^m. Long series go through multiply_fft; otherwise
+#   each a[i] is multiplied into the whole of b, which adds up every result[i] in the same order as the
+#   textbook sum over j. Stats: series products, coefficient products, FFT products and the coefficients
+#   of FFT products that had to be worked out again
+def multiply_series(a, b, m, stats=NULL_STATS):
+    square = a is b
+    a = a[:m + 1]
+    b = a if square else b[:m + 1]
+    stats.count("series_products")
+    if np is not None and min(len(a), len(b)) >= FFT_MIN_LENGTH:
+        result = multiply_fft(a, b, m, stats)
+        if result is not None:
+            stats.count("fft_products")
+            return result
     result = [0] * (m + 1)
-    for i in range(m + 1):
-        for j in range(i + 1):
-            if j < len(a) and (i - j) < len(b):
-                result[i] += a[j] * b[i - j]
+    products = 0
+    for i, ai in enumerate(a):
+        if ai:
+            for j, bj in enumerate(b[:m + 1 - i]):
+                result[i + j] += ai * bj
+            products += min(len(b), m + 1 - i)
+    stats.count("coefficient_products", products)
     return result
 
-def compute_kth_power(n, k, m, coefficients):
-    result = [1]  # Start with the series for 1 (neutral element for multiplication)
-    for _ in range(k):
-        result = multiply_series(result, coefficients, m)
-    return result
+# Function to multiply two series with NumPy's real FFT, truncated after x^m (None if a coefficient is
+#   not finite). The FFT's rounding error is absolute: every coefficient can be off by about
+#   eps log2(size) |a| |b| (Euclidean norms), however small the coefficient itself is, while the
+#   schoolbook product's error is relative to the coefficient's size, sum(|a[i]| |b[k - i]|). Each
+#   coefficient is taken from the FFT only where its error is at most FFT_MAX_ERROR times its size. To
+#   keep the norms small, the few coefficients far larger than the rest (see large_terms) are
+#   multiplied in directly, and series that grow or shrink are scaled, a[i] 2^(-t i), to keep their
+#   coefficients about level. As one t rarely suits every coefficient, up to FFT_MAX_ATTEMPTS FFTs are
+#   tried, each with the t that suits most of those still missing (see choose_growth). What is left is
+#   worked out again: by one shorter product if it all comes before the middle (small coefficients
+#   before large ones), else by summing each directly. Coefficients with no non-zero product at all
+#   come out as exact zeros (not -0.00000000)
+def multiply_fft(a, b, m, stats=NULL_STATS):
+    square = a is b
+    a = np.asarray(a, dtype=float)
+    b = a if square else np.asarray(b, dtype=float)
+    if not (np.isfinite(a).all() and np.isfinite(b).all()):
+        return None
+    nonzero_a, nonzero_b = np.flatnonzero(a), np.flatnonzero(b)
+    if not len(nonzero_a) or not len(nonzero_b) or nonzero_a[0] + nonzero_b[0] > m:
+        return [0] * (m + 1)
+    # Zeros before the first and after the last non-zero coefficient are left out, and so is what cannot
+    #   reach x^m: the product starts at x^shift, and the error bound is not set by terms never used
+    shift = int(nonzero_a[0] + nonzero_b[0])
+    a = a[nonzero_a[0]:min(nonzero_a[-1], m - nonzero_b[0]) + 1]
+    b = a if square else b[nonzero_b[0]:min(nonzero_b[-1], m - nonzero_a[0]) + 1]
+    length = min(m + 1 - shift, len(a) + len(b) - 1)
+    size = 1 << (len(a) + len(b) - 2).bit_length()
+
+    # The product and the sizes of its coefficients with a and b scaled by 2^(-growth i), scaled back,
+    #   and which of them are accurate enough and which sizes can be told from 0 (None if scaling takes a
+    #   or b out of float range)
+    def attempt(growth):
+        fa = scale_series(a, -growth)
+        fb = fa if square else scale_series(b, -growth)
+        if np.count_nonzero(fa) < np.count_nonzero(a) or np.count_nonzero(fb) < np.count_nonzero(b):
+            return None
+        large_a = large_terms(fa)
+        large_b = large_a if square else large_terms(fb)
+        small_a = fa.copy()
+        small_a[large_a] = 0.0
+        small_b = small_a if square else fb.copy()
+        small_b[large_b] = 0.0
+        error = fft_error(size, small_a, small_b)
+        if not np.isfinite(error):
+            return None
+        spectrum_a = np.fft.rfft(np.stack((small_a, np.abs(small_a))), size)
+        spectrum_b = spectrum_a if square else np.fft.rfft(np.stack((small_b, np.abs(small_b))), size)
+        product, scale = np.fft.irfft(spectrum_a * spectrum_b, size)[:, :length]  # scale is off by error too
+        # a b = large_a b + small_a large_b + small_a small_b
+        for x, y, terms in ((fa, fb, large_a), (fb, small_a, large_b)):
+            for i in terms.tolist():
+                part = y[:length - i]
+                product[i:i + len(part)] += x[i] * part
+                scale[i:i + len(part)] += abs(x[i]) * np.abs(part)
+        return (scale_series(product, growth), scale_series(scale, growth), scale * FFT_MAX_ERROR >= error,
+                scale > 100 * error)
+    result, sizes = np.zeros(length), np.zeros(length)  # sizes: 0 where not known yet
+    inaccurate, tried, growth, found_any = np.arange(length), set(), 0.0, False
+    with np.errstate(over='ignore', invalid='ignore', under='ignore', divide='ignore'):
+        while growth is not None and len(tried) < FFT_MAX_ATTEMPTS:
+            tried.add(growth)
+            found = attempt(growth)
+            if found is not None:
+                found_any = True
+                product, scale, accurate, known = found
+                sizes[known] = scale[known]
+                result[inaccurate] = product[inaccurate]  # The best there is so far
+                inaccurate = inaccurate[~accurate[inaccurate]]
+            if len(inaccurate) <= FFT_MIN_LENGTH:  # A few are cheaper to sum than to scale for
+                break
+            growth = choose_growth(a, b, size, sizes, inaccurate, tried)
+    if not found_any:
+        return None
+    unsure = inaccurate[sizes[inaccurate] == 0]  # Sizes that could not be told from 0
+    if len(unsure):
+        terms = np.rint(np.fft.irfft(np.fft.rfft(a != 0, size) * np.fft.rfft(b != 0, size), size)[:length]) > 0
+        result[unsure[~terms[unsure]]] = 0.0  # No non-zero product
+        inaccurate = inaccurate[terms[inaccurate]]
+    if len(inaccurate) > FFT_MIN_LENGTH and inaccurate[-1] < length // 2:
+        # result[:prefix] only needs a[:prefix] and b[:prefix], whose norms are smaller
+        prefix = int(inaccurate[-1]) + 1
+        low = a[:prefix].tolist()
+        again = multiply_series(low, low if square else b[:prefix].tolist(), prefix - 1, stats)
+        result[inaccurate] = np.asarray(again, dtype=float)[inaccurate]
+    else:
+        for k in inaccurate.tolist():
+            low, high = max(0, k - len(b) + 1), min(k, len(a) - 1)
+            result[k] = a[low:high + 1] @ b[k - high:k - low + 1][::-1]
+    stats.count("fft_recomputed_coefficients", len(inaccurate))
+    return [0] * shift + result.tolist() + [0] * (m + 1 - shift - length)
+
+# Function to find the coefficients of x that multiply_fft multiplies in directly: those over 2^10 times
+#   the median size of the non-zero ones (taken from about 1024 of them), if there are at most
+#   FFT_MIN_LENGTH / 4 of them (e.g. a[0] = 1 in front of small terms). Each costs one pass over the
+#   other series, and takes its size out of the FFT's error bound
+def large_terms(x):
+    sizes = np.abs(x)
+    nonzero = sizes[sizes > 0]
+    if not len(nonzero):
+        return np.flatnonzero(nonzero)
+    index = np.flatnonzero(sizes > 1024 * np.median(nonzero[::max(1, len(nonzero) // 1024)]))
+    return index if len(index) <= FFT_MIN_LENGTH // 4 else index[:0]
+
+# Function for the FFT's error bound on a product of two series (Euclidean norms, see multiply_fft)
+def fft_error(size, a, b):
+    return np.finfo(float).eps * (size.bit_length() - 1) * np.linalg.norm(a) * np.linalg.norm(b)
 
+# Function to fit the growth of the coefficients of two series, in bits per term: least squares on
+#   log2 |a[i]| and log2 |b[j]| (non-zero ones, each series around its own mean), rounded to a multiple
+#   of 2^-10 so that i t is exact in scale_series. 0 for series with no clear growth
+def geometric_growth(fa, fb):
+    covariance, variance = 0.0, 0.0
+    for x in (fa, fb):
+        index = np.flatnonzero(x)
+        if len(index) > 1:
+            bits = np.log2(np.abs(x[index]))
+            index = index - index.mean()
+            covariance += float(index @ (bits - bits.mean()))
+            variance += float(index @ index)
+    return 0.0 if not variance else round(covariance / variance * 1024) / 1024
+
+# Function to pick the growth t for multiply_fft's next FFT, from a grid up to three times the fitted
+#   growth in steps of a quarter: the one (not tried yet) that would leave the fewest of the inaccurate
+#   coefficients still inaccurate. Scaling by 2^(-t i) scales result k and its size by exactly
+#   2^(-t k), so each t is judged from the sizes known so far and the scaled norms, without another FFT.
+#   None if no t would help, unless the fitted one has not been tried (sizes not known yet, e.g. far
+#   below the largest)
+def choose_growth(a, b, size, sizes, inaccurate, tried):
+    fitted = geometric_growth(a, b)
+    if not fitted:
+        return None
+    grid = np.array(sorted({round(fitted * step / 4 * 1024) / 1024 for step in range(13)} - tried))
+    if not len(grid):
+        return None
+    norms = scaled_norms(a, grid) + scaled_norms(b, grid)
+    bounds = math.log2(np.finfo(float).eps * (size.bit_length() - 1)) + norms
+    bits = np.log2(sizes[inaccurate]) + math.log2(FFT_MAX_ERROR)
+    counts = np.count_nonzero(bits[None, :] - np.outer(grid, inaccurate) < bounds[:, None], axis=1)
+    counts[~np.isfinite(norms)] = len(inaccurate)
+    if counts.min() < len(inaccurate):
+        return float(grid[np.argmin(counts)])
+    return None if fitted in tried else fitted
+
+# Function for log2 of the Euclidean norm of x scaled by 2^(-t i), without its large terms (see
+#   large_terms), for each t in grid. inf or -inf where scaling takes a coefficient out of float range
+def scaled_norms(x, grid):
+    index = np.flatnonzero(x)
+    bits = np.log2(np.abs(x[index]))[None, :] - np.outer(grid, index)
+    large = bits > np.median(bits[:, ::max(1, len(index) // 1024)], axis=1, keepdims=True) + 10
+    large &= (np.count_nonzero(large, axis=1) <= FFT_MIN_LENGTH // 4)[:, None]
+    top = np.where(large, -np.inf, bits).max(axis=1)
+    norms = top + np.log2(np.sum(np.where(large, 0.0, np.exp2(2 * (bits - top[:, None]))), axis=1)) / 2
+    norms[(bits.min(axis=1) < -1074) | (bits.max(axis=1) >= 1024)] = np.inf
+    return norms
+
+# Function to multiply x[i] by 2^(t i), as 2^(fraction) times a power of 2, so that scaling by t and then
+#   by -t only rounds each coefficient a couple of times
+def scale_series(x, t):
+    if not t:
+        return x
+    bits = np.arange(len(x)) * t
+    whole = np.floor(bits)
+    return np.ldexp(x * np.exp2(bits - whole), whole.astype(np.int64))
+
+# Function to compute the k-th power truncated after x^m. method="binary" squares repeatedly: O(log k)
+#   series products instead of k. method="miller" uses J.C.P. Miller's recurrence, O(n m) for a degree n
+#   polynomial, but it divides by a[0], so its rounding errors can grow without bound unless |a[0]|
+#   clearly outweighs the other coefficients (about |a[0]| > sum |a[j]|); it falls back to "binary"
+#   when they get too large (see miller_power). method="repeated" is the plain k products
+def compute_kth_power(n, k, m, coefficients, stats=NULL_STATS, method="binary"):
+    if k == 0:
+        return [1]  # The series for 1 (neutral element for multiplication)
+    if method == "miller":
+        return miller_power(n, k, m, coefficients, stats)
+    if method == "repeated":
+        result = [1]
+        for _ in range(k):
+            result = multiply_series(result, coefficients, m, stats)
+        return result
+    result, square = None, coefficients
+    while True:
+        if k & 1:
+            result = square[:m + 1] if result is None else multiply_series(result, square, m, stats)
+        k >>= 1
+        if not k:
+            return result + [0] * (m + 1 - len(result))
+        square = multiply_series(square, square, m, stats)
+
+# Function to compute the k-th power with J.C.P. Miller's recurrence: for a series a with a[0] != 0,
+#   b = a^k has b[0] = a[0]^k and b[i] = sum(((k + 1) j - i) a[j] b[i - j] for j = 1..min(i, n)) / (i a[0]).
+#   Leading zero coefficients are taken out first as a power of x, and nothing past degree n k is
+#   computed (rounding would leave tiny non-zero values there). The recurrence is only stable when |a[0]|
+#   clearly outweighs the other coefficients, so each b[i] carries a bound on its error (the errors of
+#   the b[i - j] it uses, times the same weights, plus its own rounding). The power of |a| is worked out
+#   alongside, as the sizes binary powering's errors are relative to; as soon as a bound is over
+#   MILLER_MAX_ERROR times max(size, 1), the power is worked out by binary powering instead.
+#   Stats: coefficient products and fallbacks
+def miller_power(n, k, m, coefficients, stats=NULL_STATS):
+    shift = next((i for i, c in enumerate(coefficients[:n + 1]) if c), None)
+    result = [0] * (m + 1)
+    if shift is None or shift * k > m:
+        return result  # The power starts after x^m
+    a = coefficients[shift:n + 1]
+    degree = len(a) - 1
+    terms = min(m - shift * k, degree * k)  # Coefficients of (a / x^shift)^k needed; the rest are exactly 0
+    rounding = (degree + 2) * sys.float_info.epsilon  # Of each sum, relative to the sizes of its terms
+    series = [(a, [0] * (terms + 1), [0.0] * (terms + 1)), ([abs(c) for c in a], [0] * (terms + 1), [0.0] * (terms + 1))]
+    for x, b, error in series:  # Each with its error bounds
+        b[0] = x[0] ** k
+        error[0] = sys.float_info.epsilon * abs(b[0])
+    products = 0
+    for i in range(1, terms + 1):
+        for x, b, error in series:
+            total, bound = 0, 0.0
+            for j in range(1, min(i, degree) + 1):
+                if x[j]:
+                    weight = ((k + 1) * j - i) * x[j]
+                    total += weight * b[i - j]
+                    bound += abs(weight) * (error[i - j] + rounding * abs(b[i - j]))
+            b[i] = total / (i * x[0])
+            error[i] = bound / abs(i * x[0]) + sys.float_info.epsilon * abs(b[i])
+        products += 2 * min(i, degree)
+        size = series[1][1][i]
+        if max(series[0][2][i], series[1][2][i]) > MILLER_MAX_ERROR * max(size, 1):
+            stats.count("coefficient_products", products)
+            stats.count("miller_fallbacks")
+            return compute_kth_power(n, k, m, coefficients, stats, "binary")
+    stats.count("coefficient_products", products)
+    b = series[0][1]
+    result[shift * k:shift * k + len(b)] = b
+    return result
 
 # Function to compute the first m + 1 coefficients of the reciprocal of the power series
 def compute_reciprocal(n, m, coefficients):
@@ -44,6 +309,358 @@ def compute_inverse(n, m, coefficients):
         result[i] = -sum_terms / coefficients[1]
     return result
 
+# Function to compute the first m + 1 coefficients of the reciprocal 1 / a by Newton's iteration: if b is
+#   right up to x^(p - 1), then b + b (1 - a b) is right up to x^(2p - 1). Each step doubles the
+#   precision with two series products, so the whole cost is a constant times one product of length m
+def reciprocal_newton(n, m, coefficients, stats=NULL_STATS):
+    a = coefficients[:min(n, m) + 1]
+    if a[0] == 0:
+        return None  # Reciprocal does not exist if a0 is 0
+    b = [1 / a[0]]
+    p = 1
+    while p < m + 1:
+        right, p = p, min(2 * p, m + 1)
+        error = [-c for c in multiply_series(a[:p], b, p - 1, stats)]  # 1 - a b
+        error[:right] = [0] * right  # Exactly 0 up to x^(right - 1), only rounding is left there
+        b = [x + y for x, y in zip(b + [0] * (p - len(b)), multiply_series(b, error, p - 1, stats))]
+        stats.count("newton_steps")
+    return b
+
+# Function to compose each series in fs with g (g[0] = 0), truncated after x^m, Brent-Kung style: with
+#   r about sqrt(len f), the baby steps g^0 .. g^(r - 1) are combined r coefficients of f at a time (one
+#   matrix product with NumPy), and the blocks are put together by Horner's rule in the giant step g^r.
+#   About 2 sqrt(m) series products instead of m. All the fs share the powers of g
+def compose_series(fs, g, m, stats=NULL_STATS):
+    length = max(min(len(f), m + 1) for f in fs)  # f's terms past x^m do not matter, g^i starts at x^i
+    r = max(1, math.isqrt(length - 1) + 1)
+    powers = [[1] + [0] * m]
+    for _ in range(r):
+        powers.append(multiply_series(powers[-1], g, m, stats))
+    results = []
+    for f in fs:
+        f = f[:m + 1]
+        blocks = -(-len(f) // r)
+        if np is not None:
+            grid = np.zeros((blocks, r))
+            grid.flat[:len(f)] = f
+            parts = (grid @ np.array(powers[:r], dtype=float)).tolist()
+        else:
+            parts = []
+            for i in range(blocks):
+                part = [0] * (m + 1)
+                for j, c in enumerate(f[i * r:(i + 1) * r]):
+                    if c:
+                        for t, value in enumerate(powers[j]):
+                            part[t] += c * value
+                parts.append(part)
+        result = parts[-1]
+        for part in reversed(parts[:-1]):
+            result = [x + y for x, y in zip(multiply_series(result, powers[r], m, stats), part)]
+        results.append(result)
+    return results
+
+# Function to compute the first m + 1 coefficients of the compositional inverse g of a (a(g(x)) = x) by
+#   Newton's iteration on composition: g <- g - (a(g) - x) / a'(g) doubles the number of right
+#   coefficients each step. Exists only if a0 = 0 and a1 != 0
+def inverse_newton(n, m, coefficients, stats=NULL_STATS):
+    if coefficients[0] != 0 or len(coefficients) < 2 or coefficients[1] == 0:
+        return None
+    a = coefficients[:min(n, m + 1) + 1]
+    derivative = [i * c for i, c in enumerate(a)][1:]
+    g = [0, 1 / a[1]]  # Right up to x^1
+    p = 2
+    while p < m + 1:
+        right, p = p, min(2 * p, m + 1)
+        g += [0] * (p - len(g))
+        value, slope = compose_series([a, derivative], g, p - 1, stats)
+        value[1] -= 1  # a(g) - x
+        value[:right] = [0] * right  # Exactly 0 up to x^(right - 1), only rounding is left there
+        step = multiply_series(value, reciprocal_newton(p - 1, p - 1, slope, stats), p - 1, stats)
+        g = [x - y for x, y in zip(g, step)]
+        stats.count("newton_steps")
+    return (g + [0] * m)[:m + 1]
+
+
+# Exact mode. Every result is worked out modulo several NTT-friendly primes (NumPy int64 NTTs, or a plain
+#   loop without NumPy), the residues are joined by CRT, and each coefficient is rebuilt as the smallest
+#   fraction with those residues (rational reconstruction). Primes are added in doubling batches until
+#   the rebuilt coefficients stop changing, so the work grows with the size of the answer, not of a bound
+
+_ntt_primes = []
+_bit_reversal = {}  # Bit-reversed index order for each NTT length
+_twiddles = {}  # Powers of the root of unity for (prime, length, inverse)
+
+# Function to list the exact mode primes, p = c * 2^NTT_ROOT_BITS + 1 < 2^31 from the top down, each with
+#   a root of unity of order 2^NTT_ROOT_BITS (a quadratic non-residue to the power c)
+def ntt_primes():
+    if not _ntt_primes:
+        for c in range(((1 << 31) - 1) >> NTT_ROOT_BITS, 0, -1):
+            p = (c << NTT_ROOT_BITS) + 1
+            if is_prime(p):
+                x = next(x for x in range(2, p) if pow(x, (p - 1) // 2, p) == p - 1)
+                _ntt_primes.append((p, pow(x, c, p)))
+    return _ntt_primes
+
+# Function to test a number below 2^31 for primality (Miller-Rabin, bases 2, 3, 5 and 7 are enough there)
+def is_prime(p):
+    if p < 2 or p % 2 == 0:
+        return p == 2
+    d, s = p - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in (2, 3, 5, 7):
+        if a % p == 0:
+            continue
+        x = pow(a, d, p)
+        if x in (1, p - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % p
+            if x == p - 1:
+                break
+        else:
+            return False
+    return True
+
+# Function for the number-theoretic transform of a (length a power of 2, at most 2^NTT_ROOT_BITS) modulo
+#   p, in place of the FFT. root has order 2^NTT_ROOT_BITS; invert=True transforms back, including the
+#   division by the length
+def ntt(a, p, root, invert=False):
+    size = len(a)
+    if size > 1 << NTT_ROOT_BITS:
+        raise ValueError(f"NTT length {size} is over 2^{NTT_ROOT_BITS}, the order of the primes' roots of unity")
+    key = (p, size, invert)
+    if key not in _twiddles:
+        if len(_twiddles) > 8:  # Only the current prime's tables are worth keeping
+            _twiddles.clear()
+        w = pow(root, (1 << NTT_ROOT_BITS) // size, p)
+        if invert:
+            w = pow(w, p - 2, p)
+        table = np.ones(1, dtype=np.int64)
+        while len(table) < size // 2:  # w^0 .. w^(size/2 - 1), doubling the table each time
+            table = np.concatenate((table, table * pow(w, len(table), p) % p))
+        _twiddles[key] = table
+    twiddles = _twiddles[key]
+    if size not in _bit_reversal:
+        bits = size.bit_length() - 1
+        order = np.zeros(size, dtype=np.int64)
+        for b in range(bits):
+            order |= ((np.arange(size) >> b) & 1) << (bits - 1 - b)
+        _bit_reversal[size] = order
+    a = a[_bit_reversal[size]]
+    out = np.empty_like(a)
+    length = 1
+    while length < size:
+        blocks, result = a.reshape(-1, 2, length), out.reshape(-1, 2, length)
+        low = blocks[:, 0, :]
+        high = blocks[:, 1, :] * twiddles[::size // (2 * length)] % p
+        np.add(low, high, out=result[:, 0, :])
+        np.subtract(low, high, out=result[:, 1, :])
+        out %= p
+        a, out = out, a
+        length *= 2
+    if invert:
+        a = a * pow(size, p - 2, p) % p
+    return a
+
+# Function to multiply two series of residues modulo p, truncated after x^m. NTT with NumPy for long
+#   series, else a plain loop. Products too long for one NTT are cut into pieces of 2^(NTT_ROOT_BITS - 1)
+#   terms: each piece is transformed once, and the piece products that land on the same place are added
+#   up before transforming back
+def multiply_mod(a, b, m, p, root):
+    square = a is b
+    a, b = a[:m + 1], b[:m + 1]
+    if np is not None and min(len(a), len(b)) >= NTT_MIN_LENGTH:
+        length = min(m + 1, len(a) + len(b) - 1)
+        size = 1 << (len(a) + len(b) - 2).bit_length()
+        piece = size if size <= 1 << NTT_ROOT_BITS else 1 << (NTT_ROOT_BITS - 1)  # Whole a and b if they fit
+        size = min(size, 1 << NTT_ROOT_BITS)
+
+        def spectra(x):
+            pieces = []
+            for start in range(0, len(x), piece):
+                f = np.zeros(size, dtype=np.int64)
+                f[:min(piece, len(x) - start)] = x[start:start + piece]
+                pieces.append(ntt(f, p, root))
+            return pieces
+        fa = spectra(a)
+        fb = fa if square else spectra(b)  # One set of forward transforms is enough for a square
+        result = np.zeros((len(fa) + len(fb)) * piece, dtype=np.int64)
+        for place in range(min(len(fa) + len(fb) - 1, m // piece + 1)):
+            total = np.zeros(size, dtype=np.int64)
+            for i in range(max(0, place - len(fb) + 1), min(place, len(fa) - 1) + 1):
+                total = (total + fa[i] * fb[place - i]) % p
+            result[place * piece:place * piece + size] += ntt(total, p, root, invert=True)
+        return (result[:length] % p).tolist() + [0] * (m + 1 - length)
+    result = [0] * (m + 1)
+    for i, ai in enumerate(a):
+        if ai:
+            for j, bj in enumerate(b[:m + 1 - i]):
+                result[i + j] += ai * bj
+    return [c % p for c in result]
+
+# Function to find the k-th power modulo p by repeated squaring
+def power_mod(a, k, m, p, root):
+    result, square = [1] + [0] * m, a
+    while k:
+        if k & 1:
+            result = multiply_mod(result, square, m, p, root)
+        k >>= 1
+        if k:
+            square = multiply_mod(square, square, m, p, root)
+    return result
+
+# Function to find the reciprocal modulo p by Newton's iteration, as reciprocal_newton
+def reciprocal_mod(a, m, p, root):
+    b = [pow(a[0], p - 2, p)]
+    length = 1
+    while length < m + 1:
+        length = min(2 * length, m + 1)
+        error = [-c % p for c in multiply_mod(a[:length], b, length - 1, p, root)]
+        error[0] = (error[0] + 1) % p
+        b = [(x + y) % p for x, y in zip(b + [0] * (length - len(b)), multiply_mod(b, error, length - 1, p, root))]
+    return b
+
+# Function to find the compositional inverse modulo p by Newton's iteration, as inverse_newton, with
+#   a(g) and a'(g) by compose_mod
+def inverse_mod(a, m, p, root):
+    derivative = [i * c % p for i, c in enumerate(a)][1:]
+    g = [0, pow(a[1], p - 2, p)]
+    length = 2
+    while length < m + 1:
+        length = min(2 * length, m + 1)
+        g += [0] * (length - len(g))
+        value, slope = compose_mod([a[:length], derivative[:length]], g, length - 1, p, root)
+        value[1] = (value[1] - 1) % p  # a(g) - x
+        step = multiply_mod(value, reciprocal_mod(slope, length - 1, p, root), length - 1, p, root)
+        g = [(x - y) % p for x, y in zip(g, step)]
+    return (g + [0] * m)[:m + 1]
+
+# Function to compose each series in fs with g (g[0] = 0) modulo p, truncated after x^m, Brent-Kung style
+#   as compose_series
+def compose_mod(fs, g, m, p, root):
+    length = max(min(len(f), m + 1) for f in fs)
+    r = max(1, math.isqrt(length - 1) + 1)
+    powers = [[1] + [0] * m]
+    for _ in range(r):
+        powers.append(multiply_mod(powers[-1], g, m, p, root))
+    results = []
+    for f in fs:
+        f = f[:m + 1]
+        blocks = -(-len(f) // r)
+        if np is not None:
+            grid = np.zeros((blocks, r), dtype=np.int64)
+            grid.flat[:len(f)] = f
+            parts = multiply_matrices_mod(grid, np.array(powers[:r], dtype=np.int64), p).tolist()
+        else:
+            parts = []
+            for i in range(blocks):
+                part = [0] * (m + 1)
+                for j, c in enumerate(f[i * r:(i + 1) * r]):
+                    if c:
+                        for t, value in enumerate(powers[j]):
+                            part[t] += c * value
+                parts.append([x % p for x in part])
+        result = parts[-1]
+        for part in reversed(parts[:-1]):
+            result = [(x + y) % p for x, y in zip(multiply_mod(result, powers[r], m, p, root), part)]
+        results.append(result)
+    return results
+
+# Function to multiply two matrices of residues modulo p with NumPy. The entries are cut into 16-bit
+#   halves, so the four float products are exact (sums of fewer than 2^21 products below 2^32)
+def multiply_matrices_mod(x, y, p):
+    def product(u, v):
+        return (u.astype(float) @ v.astype(float)).astype(np.int64) % p
+    high_x, low_x = x >> 16, x & 0xFFFF
+    high_y, low_y = y >> 16, y & 0xFFFF
+    high = product(high_x, high_y) * pow(2, 32, p) % p
+    middle = (product(high_x, low_y) + product(low_x, high_y)) % p
+    return (high + middle * 65536 + product(low_x, low_y)) % p
+
+# Function to get the fraction n / d with |n|, d <= sqrt(r / 2) that is r modulo M, or None
+def rational_reconstruction(r, modulus):
+    old_r, r = modulus, r % modulus
+    old_t, t = 0, 1
+    while 2 * r * r > modulus:
+        q = old_r // r
+        old_r, r = r, old_r - q * r
+        old_t, t = t, old_t - q * t
+    if t == 0 or 2 * t * t > modulus or math.gcd(r, t) != 1:
+        return None
+    return Fraction(r, t)
+
+# Function to solve exactly: residues(p, root) gives the m + 1 result coefficients modulo p (None if p
+#   divides a denominator or a coefficient that must be non-zero, so the prime is skipped). Once every
+#   coefficient can be rebuilt, the fractions are checked against one more prime; if that fails the
+#   prime joins the others and the next batch is twice as big. Stats: primes
+def solve_exact(residues, m, stats=NULL_STATS):
+    good = ((p, r) for p, root in ntt_primes() for r in [residues(p, root)] if r is not None)
+    modulus, values, batch = 1, [0] * (m + 1), 2
+    while True:
+        for p, r in good:
+            factor = pow(modulus, -1, p)
+            values = [x + modulus * ((ri - x) * factor % p) for x, ri in zip(values, r)]  # CRT, one prime
+            modulus *= p
+            stats.count("primes")
+            batch -= 1
+            if not batch:
+                break
+        rebuilt = [rational_reconstruction(x, modulus) for x in values]
+        if None not in rebuilt:
+            p, r = next(good, (None, None))
+            if p is None:
+                return rebuilt  # No prime left to check with
+            stats.count("primes")
+            if all(c.denominator % p and (c.numerator - ri * c.denominator) % p == 0 for c, ri in zip(rebuilt, r)):
+                return rebuilt
+            factor = pow(modulus, -1, p)
+            values = [x + modulus * ((ri - x) * factor % p) for x, ri in zip(values, r)]
+            modulus *= p
+        elif batch:
+            raise ValueError("exact coefficients need more primes than there are below 2^31")
+        batch = max(2, modulus.bit_length() // 31)  # About as many primes again as are in use
+
+# Function to reduce Fraction coefficients modulo p (None if p divides a denominator)
+def residues_of(coefficients, p):
+    if any(c.denominator % p == 0 for c in coefficients):
+        return None
+    return [c.numerator * pow(c.denominator, p - 2, p) % p for c in coefficients]
+
+# Function to compute the k-th power exactly (Fraction coefficients)
+def exact_kth_power(n, k, m, coefficients, stats=NULL_STATS):
+    if k == 0:
+        return [Fraction(1)]
+
+    def residues(p, root):
+        a = residues_of(coefficients, p)
+        return None if a is None else power_mod(a, k, m, p, root)
+    return solve_exact(residues, m, stats)
+
+# Function to compute the reciprocal exactly (Fraction coefficients)
+def exact_reciprocal(n, m, coefficients, stats=NULL_STATS):
+    if coefficients[0] == 0:
+        return None
+
+    def residues(p, root):
+        a = residues_of(coefficients[:m + 1], p)
+        return None if a is None or a[0] == 0 else reciprocal_mod(a, m, p, root)
+    return solve_exact(residues, m, stats)
+
+# Function to compute the compositional inverse exactly (Fraction coefficients)
+def exact_inverse(n, m, coefficients, stats=NULL_STATS):
+    if coefficients[0] != 0 or len(coefficients) < 2 or coefficients[1] == 0:
+        return None
+
+    def residues(p, root):
+        a = residues_of(coefficients[:m + 2], p)
+        return None if a is None or a[1] == 0 else inverse_mod(a, m, p, root)
+    return solve_exact(residues, m, stats)
+
+# Function to print one coefficient: exact ones as integers or fractions, floats with 8 decimals
+def format_coefficient(coef):
+    return str(coef) if isinstance(coef, Fraction) else f"{coef:.8f}"
+
 
 # Function to write the output to a file
 def write_output(file_path, kth_power, reciprocal, inverse):
@@ -62,38 +679,75 @@ def write_output(file_path, kth_power, reciprocal, inverse):
         
         # Write k-th power coefficients
         file.write("k-th Power Coefficients:\n")
-        file.write(" ".join(f"{coef:.8f}" for coef in kth_power) + "\n")
+        file.write(" ".join(format_coefficient(coef) for coef in kth_power) + "\n")
         
         # Write reciprocal coefficients (if exists)
         if reciprocal is not None:
             file.write("Reciprocal Coefficients:\n")
-            file.write(" ".join(f"{coef:.8f}" for coef in reciprocal) + "\n")
+            file.write(" ".join(format_coefficient(coef) for coef in reciprocal) + "\n")
         
         # Write inverse coefficients (if exists)
         if inverse is not None:
             file.write("Inverse Coefficients:\n")
-            file.write(" ".join(f"{coef:.8f}" for coef in inverse) + "\n")
-
-# Main function to process a single file
-def process_file(input_filepath, output_filepath):
-    n, k, m, coefficients = read_power_series(input_filepath)
-    kth_power = compute_kth_power(n, k, m, coefficients)
-    reciprocal = compute_reciprocal(n, m, coefficients)
-    inverse = compute_inverse(n, m, coefficients)
-    write_output(output_filepath, kth_power, reciprocal, inverse)
-
-# Function to process all files in the input directory
-def process_all_files(input_dir, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".txt"):  # Assuming input files have .txt extension
-            input_filepath = os.path.join(input_dir, filename)
-            output_filepath = os.path.join(output_dir, filename.replace(".txt", "_output.txt"))
-            process_file(input_filepath, output_filepath)
+            file.write(" ".join(format_coefficient(coef) for coef in inverse) + "\n")
+
+# Main function to process a single file. Stats (see common/stats.py) get parse, solve and write times,
+#   a timer for each of the three results, and the multiplication counters. series_method="newton" uses
+#   reciprocal_newton and inverse_newton: these give the true reciprocal and compositional inverse, so
+#   their output differs from the default "recurrence" functions above. exact=True computes all three
+#   results as exact fractions (exact_kth_power, exact_reciprocal, exact_inverse)
+def process_file(input_filepath, output_filepath, stats=NULL_STATS, power_method="binary", series_method="recurrence", exact=False):
+    with stats.timer("parse"):
+        n, k, m, coefficients = read_power_series(input_filepath, exact)
+    if exact:
+        with stats.timer("solve"):
+            with stats.timer("kth_power"):
+                kth_power = exact_kth_power(n, k, m, coefficients, stats)
+            with stats.timer("reciprocal"):
+                reciprocal = exact_reciprocal(n, m, coefficients, stats)
+            with stats.timer("inverse"):
+                inverse = exact_inverse(n, m, coefficients, stats)
+        with stats.timer("write"):
+            write_output(output_filepath, kth_power, reciprocal, inverse)
+        return
+    with stats.timer("solve"):
+        with stats.timer("kth_power"):
+            kth_power = compute_kth_power(n, k, m, coefficients, stats, power_method)
+        with stats.timer("reciprocal"):
+            if series_method == "newton":
+                reciprocal = reciprocal_newton(n, m, coefficients, stats)
+            else:
+                reciprocal = compute_reciprocal(n, m, coefficients)
+        with stats.timer("inverse"):
+            if series_method == "newton":
+                inverse = inverse_newton(n, m, coefficients, stats)
+            else:
+                inverse = compute_inverse(n, m, coefficients)
+    with stats.timer("write"):
+        write_output(output_filepath, kth_power, reciprocal, inverse)
+
+# Function to process all files in the input directory.
+#   Runs through common/batch.py: files in parallel (processes), skipping those whose output is up to
+#   date unless force=True. With stats_file set, one JSON line of stats per file that ran is appended to it
+def process_all_files(input_dir, output_dir, stats_file=None, power_method="binary", series_method="recurrence", exact=False,
+                      processes=None, force=False):
+    process = partial(process_file, power_method=power_method, series_method=series_method, exact=exact)
+    options = f"{power_method} {series_method} {exact}"
+    run_batch(input_dir, output_dir, process, "coeff_finder", source_version(__file__, options=options),
+              stats_file, processes, force)
 
 # Entry point for the program
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="k-th power, reciprocal and inverse of every power series in Inputs.")
+    parser.add_argument("--power", choices=("binary", "miller", "repeated"), default="binary",
+                        help="how the k-th power is computed (see compute_kth_power)")
+    parser.add_argument("--series", choices=("recurrence", "newton"), default="recurrence",
+                        help="how the reciprocal and inverse are computed (newton: true reciprocal and compositional inverse)")
+    parser.add_argument("--exact", action="store_true", help="exact fractions instead of floats (modular NTT, CRT)")
+    parser.add_argument("--processes", type=int, help="worker processes for the input files (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="redo every input, even those whose output is up to date")
+    args = parser.parse_args()
     input_dir = "Inputs"  # Directory containing input files
     output_dir = "Outputs"  # Directory for output files
-    process_all_files(input_dir, output_dir)  # Process all input files
+    process_all_files(input_dir, output_dir, stats_file_from_env(), args.power, args.series, args.exact,
+                      args.processes, args.force)  # Process all input files (APM5663_STATS=file turns on stats)